@@ -1,129 +1,74 @@
+import os
+import tempfile
+
 import streamlit as st
 import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
+
+from db_queries import _process_pbs, _process_tbs, build_ranks as db_build_ranks
 
 # Add a function to update CSVs with recent games
 
+def read_processed_csv(csv_path, process):
+    """
+    Read a CSV through process(), keeping the result in a Parquet sidecar.
+
+    Cold starts (new process, cache expiry) read the typed, already processed
+    Parquet file instead of reparsing the CSV; the sidecar is rebuilt whenever
+    the CSV is newer than it or can't be read.
+
+    Parameters:
+    -----------
+    csv_path : str
+        Source CSV file
+    process : callable
+        Takes the raw CSV dataframe and returns the processed dataframe
+
+    Returns:
+    --------
+    pd.DataFrame
+    """
+    parquet_path = os.path.splitext(csv_path)[0] + ".processed.parquet"
+
+    if (
+        os.path.exists(parquet_path)
+        and os.path.getmtime(parquet_path) >= os.path.getmtime(csv_path)
+    ):
+        try:
+            return pd.read_parquet(parquet_path, engine="pyarrow")
+        except (OSError, ValueError):
+            pass  # Corrupt / unreadable sidecar: reprocess the CSV below
+
+    df = process(pd.read_csv(csv_path))
+
+    # Write to a temp file next to the sidecar and swap it in, so an interrupted
+    # write or two sessions missing at once never leave a truncated sidecar
+    fd, tmp_path = tempfile.mkstemp(
+        prefix=os.path.basename(parquet_path) + ".",
+        suffix=".tmp",
+        dir=os.path.dirname(parquet_path) or "."
+    )
+    os.close(fd)
+    try:
+        df.to_parquet(tmp_path, engine="pyarrow", compression="zstd")
+        os.replace(tmp_path, parquet_path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return df
+
+# The CSV columns already carry the processed names, so the DB loaders'
+# renames are no-ops and their processing applies to the CSV rows as-is
 @st.cache_data
 def load_process_pbs():
-    # Load in player data
-    pbs = pd.read_csv("player_boxscores_2025_26.csv")
-
-    # Convert game_date to datetime type
-    pbs["game_date"] = pd.to_datetime(pbs["game_date"])
-
-    # Convert minutes to float 
-    def minutes_to_float(min_str):
-        if pd.isna(min_str):
-            return None
-        m, s = min_str.split(":")
-        return int(m) + int(s) / 60
-
-    pbs["minutes"] = pbs["minutes"].apply(minutes_to_float)
-
-    # Sort for correct window behavior before calculating averages
-    pbs = (
-        pbs
-        .sort_values(["personId", "game_date"])
-        .reset_index(drop=True)
-    )
-
-    # Compute season and rolling 10-game point averages
-    pbs["szn_avg_ppg"] = (
-        pbs
-        .groupby("personId")["points"]
-        .transform(lambda s: s.shift(1).expanding().mean())
-    )
-
-    pbs["r10_avg_ppg"] = (
-        pbs
-        .groupby("personId")["points"]
-        .transform(lambda s: s.shift(1).rolling(10, min_periods=1).mean())
-    )
-
-    # pbs = pbs[["gameId", "game_date", "teamTricode", "personId", "firstName", "familyName", "points", "szn_avg_ppg", "r10_avg_ppg"]]
-
-    return pbs
+    return read_processed_csv("player_boxscores_2025_26.csv", _process_pbs)
 
 @st.cache_data
 def load_process_tbs():
-    # Load in team data
-    tbs = pd.read_csv("league_gamelog_2025_26.csv")
-
-    tbs["GAME_DATE"] = pd.to_datetime(tbs["GAME_DATE"])
-
-    opp = (
-        tbs[["GAME_ID", "TEAM_ABBREVIATION", "PTS"]]
-        .rename(columns={
-            "TEAM_ABBREVIATION": "OPP_TEAM",
-            "PTS": "OPP_PTS"
-        })
-    )
-
-    merged = tbs.merge(
-        opp,
-        on="GAME_ID",
-        how="left",
-        validate="many_to_many"
-    )
-
-    merged = merged[merged["TEAM_ABBREVIATION"] != merged["OPP_TEAM"]]
-
-    tbs = (
-        merged
-        .rename(columns={"OPP_PTS": "PTS_ALLOWED"})
-    )
-
-    tbs = tbs[["GAME_ID", "TEAM_ABBREVIATION", "GAME_DATE", "PTS", "MATCHUP", "OPP_TEAM", "PTS_ALLOWED", "WL"]]
+    return read_processed_csv("league_gamelog_2025_26.csv", _process_tbs)
 
-    return tbs
-
-@st.cache_data
+# Hash tbs by row count + last game date instead of its full contents; that key
+# changes with the data, so the result can also outlive the process on disk
+@st.cache_data(persist="disk", hash_funcs={pd.DataFrame: lambda df: (len(df), df["GAME_DATE"].max())})
 def build_ranks(tbs):
-    # Get all unique game dates in order
-    season_start = tbs["GAME_DATE"].min()
-    season_end = tbs["GAME_DATE"].max() + pd.Timedelta(days=1)
-
-    game_dates = pd.date_range(
-        start=season_start,
-        end=season_end,
-        freq="D"
-    )
-
-    daily_ranks = []
-
-    for game_date in game_dates:
-        prior_games = tbs[tbs["GAME_DATE"] < game_date]
-
-        # Skip dates before anyone has played
-        if prior_games.empty:
-            continue
-
-        ranks = (
-            prior_games
-            .groupby("TEAM_ABBREVIATION", as_index=False)
-            .agg(
-                games_played=("GAME_ID", "count"),
-                avg_pts=("PTS", "mean"),
-                avg_pts_allowed=("PTS_ALLOWED", "mean"),
-            )
-        )
-
-        # Ranks (league context as of this date)
-        ranks["off_rank"] = ranks["avg_pts"].rank(
-            method="first", ascending=False
-        )
-        ranks["def_rank"] = ranks["avg_pts_allowed"].rank(
-            method="first", ascending=True
-        )
-
-        ranks["game_date"] = game_date
-        daily_ranks.append(ranks)
-
-    daily_ranks = (
-        pd.concat(daily_ranks, ignore_index=True)
-        .sort_values(["game_date", "def_rank"])
-    )
-
-    return daily_ranks
+    """Daily offensive/defensive ranks; see db_queries.build_ranks."""
+    return db_build_ranks(tbs)
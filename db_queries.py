@@ -1,9 +1,66 @@
+import io
+
 import streamlit as st
 import pandas as pd
 import numpy as np
 from sqlalchemy import text
 
-@st.cache_data(ttl=3600)  # Cache for 1 hour
+from team_names import TEAM_NAMES
+
+def read_sql_copy(engine, query, params=None, dtype=None):
+    """
+    Bulk-read a SELECT through Postgres COPY ... TO STDOUT (psycopg 3).
+    
+    Streams the result as CSV in one pass instead of building Python row
+    tuples, which is much faster than pd.read_sql for the full box score tables.
+    
+    Parameters:
+    -----------
+    engine : sqlalchemy.engine
+        Database connection engine (postgresql+psycopg driver)
+    query : str
+        SELECT statement; parameters use psycopg placeholders, e.g. %(person_id)s
+    params : dict, optional
+        Query parameters (bound client-side, COPY has no server-side binding)
+    dtype : dict, optional
+        Column dtypes passed to pd.read_csv (e.g. keep game_id as str)
+    
+    Returns:
+    --------
+    pd.DataFrame
+    """
+    conn = engine.raw_connection()
+    try:
+        return _copy_to_df(conn, query, params=params, dtype=dtype)
+    finally:
+        conn.close()
+
+def _copy_to_df(conn, query, params=None, dtype=None):
+    """Run one COPY ... TO STDOUT on an already checked-out DBAPI connection."""
+    copy_sql = f"COPY ({query}) TO STDOUT WITH CSV HEADER"
+    
+    with conn.cursor() as cur:
+        with cur.copy(copy_sql, params) as copy:
+            data = b"".join(copy)
+    
+    return pd.read_csv(io.BytesIO(data), dtype=dtype)
+
+# Team game log SELECT used by the tbs loaders
+TBS_QUERY = """
+    SELECT 
+        game_id,
+        team_abbreviation,
+        game_date,
+        pts,
+        matchup,
+        wl
+    FROM raw.league_game_log
+    WHERE team_abbreviation IS NOT NULL
+        AND game_id IS NOT NULL
+    ORDER BY game_date, game_id
+"""
+
+@st.cache_data(ttl=3600, show_spinner=False)  # Cache for 1 hour
 def get_all_teams(_engine):
     """
     Query all unique teams from the league game log.
@@ -29,14 +86,116 @@ def get_all_teams(_engine):
     df = pd.read_sql(query, _engine)
     return df
 
-def get_players_by_team(engine, team_abbrev):
+@st.cache_data(ttl=600, show_spinner=False)  # Refresh every 10 minutes
+def get_team_records(_engine):
+    """
+    Season and last-10 win/loss records for every team, computed in Postgres.
+    
+    Parameters:
+    -----------
+    _engine : sqlalchemy.engine
+        Database connection engine (prefixed with _ to skip hashing)
+    
+    Returns:
+    --------
+    dict
+        {team_abbreviation: (wins, losses, l10_wins, l10_losses)} as plain ints,
+        so per-render lookups are a dict hit (and the cached copy is tiny)
+    """
+    query = text("""
+        WITH team_games AS (
+            SELECT
+                team_abbreviation,
+                wl,
+                ROW_NUMBER() OVER (
+                    PARTITION BY team_abbreviation
+                    ORDER BY game_date DESC, game_id DESC
+                ) AS rn
+            FROM raw.league_game_log
+            WHERE team_abbreviation IS NOT NULL
+                AND game_id IS NOT NULL
+        )
+        SELECT
+            team_abbreviation,
+            COUNT(*) FILTER (WHERE wl = 'W') AS wins,
+            COUNT(*) FILTER (WHERE wl = 'L') AS losses,
+            COUNT(*) FILTER (WHERE wl = 'W' AND rn <= 10) AS l10_wins,
+            COUNT(*) FILTER (WHERE wl = 'L' AND rn <= 10) AS l10_losses
+        FROM team_games
+        GROUP BY team_abbreviation
+    """)
+    
+    df = pd.read_sql(query, _engine)
+    
+    return {
+        team: (int(w), int(l), int(l10_w), int(l10_l))
+        for team, w, l, l10_w, l10_l in zip(
+            df["team_abbreviation"].to_numpy(),
+            df["wins"].to_numpy(),
+            df["losses"].to_numpy(),
+            df["l10_wins"].to_numpy(),
+            df["l10_losses"].to_numpy()
+        )
+    }
+
+@st.cache_data(ttl=600, show_spinner=False)
+def search_players(_engine, query, limit=50):
+    """
+    Find players whose name contains the search text (case-insensitive).
+    
+    Parameters:
+    -----------
+    _engine : sqlalchemy.engine
+        Database connection engine (prefixed with _ to skip hashing)
+    query : str
+        Free-text search (e.g., "lebron", "james", "bron ja")
+    limit : int
+        Maximum number of matches returned
+    
+    Returns:
+    --------
+    pd.DataFrame with columns: person_id, first_name, family_name, display_name, team_tricode
+        team_tricode is the team from the player's most recent game
+    """
+    # Escape LIKE wildcards typed by the user, then match words in order
+    escaped = query.strip().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    pattern = "%" + "%".join(escaped.split()) + "%"
+    
+    sql = text("""
+        WITH latest_team AS (
+            SELECT DISTINCT ON (person_id)
+                person_id,
+                first_name,
+                family_name,
+                team_tricode
+            FROM raw.box_score_traditional_v3
+            WHERE person_id IS NOT NULL
+                AND CONCAT(first_name, ' ', family_name) ILIKE :pattern
+            ORDER BY person_id, game_id DESC
+        )
+        SELECT 
+            person_id,
+            first_name,
+            family_name,
+            CONCAT(first_name, ' ', family_name) as display_name,
+            team_tricode
+        FROM latest_team
+        ORDER BY family_name, first_name
+        LIMIT :limit
+    """)
+    
+    df = pd.read_sql(sql, _engine, params={"pattern": pattern, "limit": limit})
+    return df
+
+@st.cache_data(ttl=3600, show_spinner=False)  # Rosters rarely change within a session
+def get_players_by_team(_engine, team_abbrev):
     """
     Query all unique players for a given team, ordered by season average PPG.
     
     Parameters:
     -----------
-    engine : sqlalchemy.engine
-        Database connection engine
+    _engine : sqlalchemy.engine
+        Database connection engine (prefixed with _ to skip hashing)
     team_abbrev : str
         Team abbreviation (e.g., "LAL", "NOP")
     
@@ -67,11 +226,11 @@ def get_players_by_team(engine, team_abbrev):
         ORDER BY avg_ppg DESC, family_name, first_name
     """)
     
-    df = pd.read_sql(query, engine, params={"team_abbrev": team_abbrev})
+    df = pd.read_sql(query, _engine, params={"team_abbrev": team_abbrev})
     return df
 
-@st.cache_data
-def load_process_pbs_from_db(_engine, person_id=None):
+@st.cache_data(ttl=600, show_spinner=False)  # Refresh every 10 minutes
+def load_process_pbs_from_db(_engine, person_id=None, columns=None):
     """
     Load and process player box scores from database.
     Equivalent to load_process_pbs() but from database.
@@ -82,11 +241,22 @@ def load_process_pbs_from_db(_engine, person_id=None):
         Database connection engine (prefixed with _ to skip hashing)
     person_id : int, optional
         If provided, filter to this player only
+    columns : tuple of str, optional
+        If provided, keep only these processed columns (e.g. those a plot needs)
+        and downcast numeric columns to the smallest int/float dtype that fits
     
     Returns:
     --------
     pd.DataFrame with processed player box scores
     """
+    query, params = _pbs_query(person_id)
+    
+    pbs = read_sql_copy(_engine, query, params=params, dtype={"game_id": str})
+    
+    return _process_pbs(pbs, columns=columns)
+
+def _pbs_query(person_id=None):
+    """Player box score SELECT (+ COPY params), optionally for one player."""
     # Base query - note: game_date might need to be cast from DATE to TIMESTAMP
     # depending on how it's stored, but DATE should work fine with pandas
     query = """
@@ -121,7 +291,7 @@ def load_process_pbs_from_db(_engine, person_id=None):
             INNER JOIN raw.league_game_log lgl 
                 ON bs.game_id = lgl.game_id 
                 AND bs.team_tricode = lgl.team_abbreviation
-            WHERE bs.person_id = :person_id
+            WHERE bs.person_id = %(person_id)s
                 AND bs.person_id IS NOT NULL
             ORDER BY bs.game_id, bs.person_id, lgl.game_date
         """
@@ -144,13 +314,14 @@ def load_process_pbs_from_db(_engine, person_id=None):
             ORDER BY bs.game_id, bs.person_id, lgl.game_date
         """
     
-    query = text(query)
-    
     params = {}
     if person_id is not None:
         params["person_id"] = person_id
     
-    pbs = pd.read_sql(query, _engine, params=params)
+    return query, params
+
+def _process_pbs(pbs, columns=None):
+    """Rename, type and enrich raw player box score rows (see load_process_pbs_from_db)."""
     
     # Rename columns to match existing code
     pbs = pbs.rename(columns={
@@ -164,17 +335,17 @@ def load_process_pbs_from_db(_engine, person_id=None):
     # Convert game_date to datetime
     pbs["game_date"] = pd.to_datetime(pbs["game_date"])
     
-    # Convert minutes (TEXT "MM:SS") to float
-    def minutes_to_float(min_str):
-        if pd.isna(min_str) or min_str is None or min_str == "":
-            return None
-        try:
-            m, s = str(min_str).split(":")
-            return int(m) + int(s) / 60
-        except (ValueError, AttributeError):
-            return None
+    # Full team name (vectorized lookup, falls back to the abbreviation)
+    pbs["teamFullName"] = pbs["teamTricode"].map(TEAM_NAMES).fillna(pbs["teamTricode"])
     
-    pbs["minutes"] = pbs["minutes"].apply(minutes_to_float)
+    # Lowercased names for teammate lookups, computed once here instead of per plot
+    pbs["firstName_lc"] = pbs["firstName"].str.lower()
+    pbs["familyName_lc"] = pbs["familyName"].str.lower()
+    
+    # Convert minutes (TEXT "MM:SS") to float in one vectorized pass;
+    # missing or malformed values become NaN
+    mm_ss = pbs["minutes"].astype("string").str.extract(r"^\s*(\d+):(\d+)\s*$").astype(float)
+    pbs["minutes"] = mm_ss[0] + mm_ss[1] / 60
     
     # Sort for correct window behavior before calculating averages
     pbs = (
@@ -183,22 +354,43 @@ def load_process_pbs_from_db(_engine, person_id=None):
         .reset_index(drop=True)
     )
     
-    # Compute season and rolling 10-game point averages
-    pbs["szn_avg_ppg"] = (
-        pbs
-        .groupby("personId")["points"]
-        .transform(lambda s: s.shift(1).expanding().mean())
-    )
+    # Compute season and rolling 10-game point averages (prior games only),
+    # with grouped cumsum / rolling kernels instead of a per-player lambda
+    points = pbs["points"].astype(float)
+    played = points.notna()
+    by_player = pbs["personId"]
+    
+    # Season: running totals up to, but not including, each game
+    prior_pts = points.fillna(0).groupby(by_player).cumsum() - points.fillna(0)
+    prior_games = played.groupby(by_player).cumsum() - played
+    pbs["szn_avg_ppg"] = prior_pts / prior_games.where(prior_games > 0)
     
     pbs["r10_avg_ppg"] = (
-        pbs
-        .groupby("personId")["points"]
-        .transform(lambda s: s.shift(1).rolling(10, min_periods=1).mean())
+        points
+        .groupby(by_player).shift(1)
+        .groupby(by_player).rolling(10, min_periods=1).mean()
+        .droplevel(0)
     )
     
+    # Narrow dtypes: categorical team columns, 32-bit player ids
+    pbs["teamTricode"] = pbs["teamTricode"].astype("category")
+    pbs["teamFullName"] = pbs["teamFullName"].astype("category")
+    pbs["personId"] = pbs["personId"].astype("int32")
+    
+    # Index by player so per-player lookups hit the sorted index instead of scanning
+    pbs = pbs.set_index("personId", drop=False).rename_axis(index=None)
+    
+    # Optional projection + numeric downcast (averages are computed above at full precision)
+    if columns is not None:
+        pbs = pbs[list(columns)]
+        for col in pbs.select_dtypes("integer").columns:
+            pbs[col] = pd.to_numeric(pbs[col], downcast="integer")
+        for col in pbs.select_dtypes("float").columns:
+            pbs[col] = pd.to_numeric(pbs[col], downcast="float")
+    
     return pbs
 
-@st.cache_data
+@st.cache_data(ttl=600, show_spinner=False)  # Refresh every 10 minutes
 def load_process_tbs_from_db(_engine):
     """
     Load and process team box scores from database.
@@ -213,21 +405,12 @@ def load_process_tbs_from_db(_engine):
     --------
     pd.DataFrame with processed team box scores
     """
-    query = text("""
-        SELECT 
-            game_id,
-            team_abbreviation,
-            game_date,
-            pts,
-            matchup,
-            wl
-        FROM raw.league_game_log
-        WHERE team_abbreviation IS NOT NULL
-            AND game_id IS NOT NULL
-        ORDER BY game_date, game_id
-    """)
+    tbs = read_sql_copy(_engine, TBS_QUERY, dtype={"game_id": str})
     
-    tbs = pd.read_sql(query, _engine)
+    return _process_tbs(tbs)
+
+def _process_tbs(tbs):
+    """Rename, type and pair raw team game log rows (see load_process_tbs_from_db)."""
     
     # Rename columns to match existing code
     tbs = tbs.rename(columns={
@@ -242,34 +425,132 @@ def load_process_tbs_from_db(_engine):
     # Convert game_date to datetime
     tbs["GAME_DATE"] = pd.to_datetime(tbs["GAME_DATE"])
     
-    # Build opponent relationships by merging on game_id
-    opp = (
-        tbs[["GAME_ID", "TEAM_ABBREVIATION", "PTS"]]
-        .rename(columns={
-            "TEAM_ABBREVIATION": "OPP_TEAM",
-            "PTS": "OPP_PTS"
-        })
+    # Full team name (vectorized lookup, falls back to the abbreviation)
+    tbs["TEAM_NAME"] = tbs["TEAM_ABBREVIATION"].map(TEAM_NAMES).fillna(tbs["TEAM_ABBREVIATION"])
+    
+    # Pair each team row with its opponent: a game has two rows, and ordering
+    # by GAME_ID puts them side by side, so a row's opponent is the other half
+    # of its pair (no many-to-many self-merge). Games without exactly two rows
+    # are dropped; a one-team game never had an opponent row anyway.
+    tbs = tbs[tbs.groupby("GAME_ID")["GAME_ID"].transform("size") == 2]
+    by_game = np.argsort(tbs["GAME_ID"].to_numpy(), kind="stable")
+    opponent = np.empty(len(tbs), dtype=np.intp)
+    opponent[by_game] = by_game[np.arange(len(tbs)) ^ 1]
+    
+    tbs = tbs.assign(
+        OPP_TEAM=tbs["TEAM_ABBREVIATION"].to_numpy()[opponent],
+        PTS_ALLOWED=tbs["PTS"].to_numpy()[opponent]
     )
     
-    merged = tbs.merge(
-        opp,
-        on="GAME_ID",
-        how="left",
-        validate="many_to_many"
+    # Select final columns to match existing structure
+    tbs = tbs[["GAME_ID", "TEAM_ABBREVIATION", "TEAM_NAME", "GAME_DATE", "PTS", "MATCHUP", "OPP_TEAM", "PTS_ALLOWED", "WL"]]
+    
+    # Home / away once here ("LAL @ NOP" is an away game) so the player
+    # slices inherit it instead of parsing MATCHUP per row
+    tbs["HOME_AWAY"] = pd.Categorical(
+        np.where(tbs["MATCHUP"].str.contains("@", regex=False), "AWAY", "HOME"),
+        categories=["AWAY", "HOME"]
     )
     
-    # Filter out self-matches
-    merged = merged[merged["TEAM_ABBREVIATION"] != merged["OPP_TEAM"]]
+    # Low-cardinality filter keys: categorical masks compare int codes, not strings.
+    # OPP_TEAM shares the team dtype so it still lines up with TEAM_ABBREVIATION
+    # as a merge_asof by-key against the daily ranks
+    team_dtype = pd.CategoricalDtype(sorted(tbs["TEAM_ABBREVIATION"].unique()))
+    tbs = tbs.astype({
+        "TEAM_ABBREVIATION": team_dtype,
+        "OPP_TEAM": team_dtype,
+        "WL": "category"
+    })
+    
+    # Presort once so per-team slices come out already in date order
+    tbs = tbs.sort_values(["TEAM_ABBREVIATION", "GAME_DATE"]).reset_index(drop=True)
+    
+    return tbs
+
+def build_tbs_by_team(tbs):
+    """
+    Split team box scores into per-team frames sorted by game date.
+    
+    Per-render team lookups index this dict instead of filtering and
+    sorting the full tbs on every rerun.
+    
+    Parameters:
+    -----------
+    tbs : pd.DataFrame
+        Processed team box scores (already sorted by team, then game date)
+    
+    Returns:
+    --------
+    dict
+        {TEAM_ABBREVIATION: pd.DataFrame sorted by GAME_DATE}
+    """
+    return {
+        team: games.reset_index(drop=True)
+        for team, games in tbs.groupby("TEAM_ABBREVIATION", observed=True, sort=False)
+    }
+
+def build_league_averages(tbs):
+    """
+    Build league-wide average points scored / allowed through each game date.
     
-    tbs = (
-        merged
-        .rename(columns={"OPP_PTS": "PTS_ALLOWED"})
+    Row for date D is the mean over every team game played on or before D, so
+    plots look up their cutoff date instead of scanning the full tbs per render.
+    
+    Parameters:
+    -----------
+    tbs : pd.DataFrame
+        Team box scores dataframe
+    
+    Returns:
+    --------
+    pd.DataFrame indexed by GAME_DATE (sorted) with columns PTS, PTS_ALLOWED
+    """
+    daily = tbs.groupby("GAME_DATE")[["PTS", "PTS_ALLOWED"]].agg(["sum", "count"])
+    
+    # Game-weighted running mean (NaN-skipping, same as Series.mean() on the cutoff slice)
+    totals = daily.xs("sum", axis=1, level=1).cumsum()
+    counts = daily.xs("count", axis=1, level=1).cumsum()
+    
+    return totals / counts.where(counts > 0)
+
+def build_latest_ranks(tbs):
+    """
+    Build current offensive/defensive rankings from team box scores.
+    
+    Equivalent to the most recent date of build_ranks() (every game played so
+    far, same tie-breaking), without computing the rest of the season.
+    
+    Parameters:
+    -----------
+    tbs : pd.DataFrame
+        Team box scores dataframe
+    
+    Returns:
+    --------
+    pd.DataFrame with one row per team: TEAM_ABBREVIATION, games_played,
+    avg_pts, avg_pts_allowed, off_rank, def_rank, game_date
+    """
+    ranks = (
+        tbs
+        .groupby("TEAM_ABBREVIATION", as_index=False, observed=True)
+        .agg(
+            games_played=("GAME_ID", "count"),
+            avg_pts=("PTS", "mean"),
+            avg_pts_allowed=("PTS_ALLOWED", "mean"),
+        )
     )
     
-    # Select final columns to match existing structure
-    tbs = tbs[["GAME_ID", "TEAM_ABBREVIATION", "GAME_DATE", "PTS", "MATCHUP", "OPP_TEAM", "PTS_ALLOWED", "WL"]]
+    ranks["off_rank"] = ranks["avg_pts"].rank(
+        method="first", ascending=False
+    )
+    ranks["def_rank"] = ranks["avg_pts_allowed"].rank(
+        method="first", ascending=True
+    )
     
-    return tbs
+    # build_ranks labels ranks by the day they apply to (day after the last game)
+    ranks["game_date"] = tbs["GAME_DATE"].max() + pd.Timedelta(days=1)
+    
+    return ranks.sort_values("def_rank")
 
 def build_ranks(tbs):
     """
@@ -283,51 +564,60 @@ def build_ranks(tbs):
     
     Returns:
     --------
-    pd.DataFrame with daily defensive rankings
+    pd.DataFrame with daily defensive rankings, sorted by game_date (then
+    def_rank). The plots and tables merge_asof against it on game_date as-is,
+    so treat it as read-only and keep that order.
     """
-    # Get all unique game dates in order
-    season_start = tbs["GAME_DATE"].min()
-    season_end = tbs["GAME_DATE"].max() + pd.Timedelta(days=1)
-    
+    # Every calendar day from the first game through the day after the last
     game_dates = pd.date_range(
-        start=season_start,
-        end=season_end,
+        start=tbs["GAME_DATE"].min(),
+        end=tbs["GAME_DATE"].max() + pd.Timedelta(days=1),
         freq="D"
     )
     
-    daily_ranks = []
-    
-    for game_date in game_dates:
-        prior_games = tbs[tbs["GAME_DATE"] < game_date]
-        
-        # Skip dates before anyone has played
-        if prior_games.empty:
-            continue
-        
-        ranks = (
-            prior_games
-            .groupby("TEAM_ABBREVIATION", as_index=False)
-            .agg(
-                games_played=("GAME_ID", "count"),
-                avg_pts=("PTS", "mean"),
-                avg_pts_allowed=("PTS_ALLOWED", "mean"),
-            )
-        )
-        
-        # Ranks (league context as of this date)
-        ranks["off_rank"] = ranks["avg_pts"].rank(
-            method="first", ascending=False
-        )
-        ranks["def_rank"] = ranks["avg_pts_allowed"].rank(
-            method="first", ascending=True
-        )
-        
-        ranks["game_date"] = game_date
-        daily_ranks.append(ranks)
-    
-    daily_ranks = (
-        pd.concat(daily_ranks, ignore_index=True)
-        .sort_values(["game_date", "def_rank"])
+    # Running per-team totals after each game, instead of re-aggregating all
+    # prior games for every date
+    tbs = tbs.sort_values("GAME_DATE", kind="stable")
+    by_team = tbs.groupby("TEAM_ABBREVIATION", observed=True, sort=False)
+    totals = pd.DataFrame({
+        "TEAM_ABBREVIATION": tbs["TEAM_ABBREVIATION"],
+        # A game counts toward the ranks from the following day on (no leakage)
+        "game_date": tbs["GAME_DATE"] + pd.Timedelta(days=1),
+        "games_played": by_team.cumcount() + 1,
+        "pts": by_team["PTS"].cumsum(),
+        "pts_allowed": by_team["PTS_ALLOWED"].cumsum(),
+    }).drop_duplicates(["game_date", "TEAM_ABBREVIATION"], keep="last")
+    
+    # date x team matrix, each date carrying the latest totals so far
+    # (teams that haven't played yet stay NaN and drop out below)
+    wide = (
+        totals
+        .pivot(index="game_date", columns="TEAM_ABBREVIATION")
+        .sort_index(axis=1)
+        .reindex(game_dates)
+        .ffill()
     )
+    games_played = wide["games_played"]
+    avg_pts = wide["pts"] / games_played
+    avg_pts_allowed = wide["pts_allowed"] / games_played
+    
+    # Ranks (league context as of each date); ties go to column (team) order
+    off_rank = avg_pts.rank(axis=1, method="first", ascending=False)
+    def_rank = avg_pts_allowed.rank(axis=1, method="first", ascending=True)
+    
+    # Long form straight from the matrices: one row per (date, team) cell where
+    # the team has played, date-major like the old per-date concat
+    played = games_played.notna().to_numpy()
+    date_idx, team_idx = np.nonzero(played)
+    
+    daily_ranks = pd.DataFrame({
+        "TEAM_ABBREVIATION": games_played.columns[team_idx],
+        "games_played": games_played.to_numpy()[played].astype("int64"),
+        "avg_pts": avg_pts.to_numpy()[played],
+        "avg_pts_allowed": avg_pts_allowed.to_numpy()[played],
+        "off_rank": off_rank.to_numpy()[played],
+        "def_rank": def_rank.to_numpy()[played],
+        "game_date": game_dates[date_idx],
+    }).sort_values(["game_date", "def_rank"])
     
     return daily_ranks
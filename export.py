@@ -1,7 +1,9 @@
 import pandas as pd
 import numpy as np
 
-def export_player_scoring(player_id, prop_line, pbs, tbs, daily_ranks, teammate_ids=None):
+from slices import teammates_out
+
+def export_player_scoring(player_id, prop_line, pbs, tbs, daily_ranks, teammate_ids=None, played_lookup=None):
     """
     Export all data used to build the player scoring plot to a CSV-ready DataFrame.
     
@@ -19,6 +21,8 @@ def export_player_scoring(player_id, prop_line, pbs, tbs, daily_ranks, teammate_
         Daily team rankings dataframe with defensive ranks
     teammate_ids : list, optional
         List of teammate identifiers (personId int or familyName str) to track absence
+    played_lookup : pd.DataFrame, optional
+        Precomputed slices.build_played_lookup(pbs) for the teammate flags
     
     Returns:
     --------
@@ -30,7 +34,7 @@ def export_player_scoring(player_id, prop_line, pbs, tbs, daily_ranks, teammate_
     # 1) Prepare player plotting dataframe (same as plot function)
     # =========================================================
 
-    export_df = pbs[pbs["personId"] == player_id].copy()
+    export_df = pbs.loc[[player_id]].copy()
 
     export_df = (
         export_df
@@ -45,31 +49,17 @@ def export_player_scoring(player_id, prop_line, pbs, tbs, daily_ranks, teammate_
     # 2) Build opponent lookup from TEAM box scores
     # =========================================================
 
-    opp_lookup = (
-        tbs[["GAME_ID", "TEAM_ABBREVIATION"]]
-        .rename(columns={
-            "GAME_ID": "game_id",
-            "TEAM_ABBREVIATION": "team"
-        })
-    )
+    # tbs already carries each team's opponent (OPP_TEAM), one row per team
+    # per game, so the player's team rows are the lookup - no self-join needed
+    team = export_df["teamTricode"].iloc[0]
 
     opp_lookup = (
-        opp_lookup
-        .merge(
-            opp_lookup,
-            on="game_id",
-            suffixes=("", "_opp")
-        )
-        .query("team != team_opp")
-        [["game_id", "team", "team_opp"]]
-        .drop_duplicates()
-        .rename(columns={"team_opp": "OPP_TEAM"})
+        tbs.loc[tbs["TEAM_ABBREVIATION"] == team, ["GAME_ID", "OPP_TEAM"]]
+        .rename(columns={"GAME_ID": "game_id"})
     )
 
-    team = export_df["teamTricode"].iloc[0]
-
     export_df = export_df.merge(
-        opp_lookup[opp_lookup["team"] == team][["game_id", "OPP_TEAM"]],
+        opp_lookup,
         on="game_id",
         how="left",
         validate="one_to_one"
@@ -79,23 +69,18 @@ def export_player_scoring(player_id, prop_line, pbs, tbs, daily_ranks, teammate_
     # 3) AS-OF MERGE opponent defensive rank
     # =========================================================
 
-    # Convert daily_ranks to match team_defense_daily structure
-    daily_ranks_export = daily_ranks.copy()
-    daily_ranks_export["as_of_date"] = pd.to_datetime(daily_ranks_export["game_date"]) + pd.Timedelta(days=1)
-    
-    daily_ranks_export = daily_ranks_export.rename(
-        columns={"TEAM_ABBREVIATION": "OPP_TEAM"}
-    )
-
-    export_df = export_df.sort_values("game_date_dt")
-    daily_ranks_export = daily_ranks_export.sort_values("as_of_date")
+    # Ranks as of the day before each game, like build_player_scoring_df:
+    # shift the player's dates back a day and merge daily_ranks as-is
+    export_df["rank_date"] = export_df["game_date_dt"] - pd.Timedelta(days=1)
 
     export_df = pd.merge_asof(
         export_df,
-        daily_ranks_export,
-        left_on="game_date_dt",
-        right_on="as_of_date",
-        by="OPP_TEAM",
+        daily_ranks,
+        left_on="rank_date",
+        right_on="game_date",
+        left_by="OPP_TEAM",
+        right_by="TEAM_ABBREVIATION",
+        suffixes=("", "_rank"),
         direction="backward"
     )
 
@@ -118,56 +103,28 @@ def export_player_scoring(player_id, prop_line, pbs, tbs, daily_ranks, teammate_
     # 6) Add teammate absence flags
     # =========================================================
 
-    pbs_names = pbs.copy()
-    pbs_names["firstName"] = pbs_names["firstName"].str.lower()
-    pbs_names["familyName"] = pbs_names["familyName"].str.lower()
-
-    player_game_ids = set(export_df["game_id"])
-
     if teammate_ids is not None:
+        # All teammates' absence flags from one played lookup
+        out_flags = teammates_out(export_df["game_id"], teammate_ids, pbs, played_lookup)
+
         for i, teammate_id in enumerate(teammate_ids):
             if isinstance(teammate_id, str):
                 # Name-based identification (e.g., "reaves")
-                teammate_games = set(
-                    pbs_names[
-                        (pbs_names["familyName"] == teammate_id.lower()) &
-                        (pbs_names["game_id"].isin(player_game_ids))
-                    ]["game_id"]
-                )
-                
                 # Get teammate name for column header
-                name_row = (
-                    pbs_names[pbs_names["familyName"] == teammate_id.lower()]
-                    [["firstName", "familyName"]]
-                    .drop_duplicates()
-                    .iloc[0]
-                )
-                teammate_name = f"{name_row['familyName'].title()}"
+                name_idx = np.flatnonzero(pbs["familyName_lc"].to_numpy() == teammate_id.lower())[0]
+                teammate_name = pbs["familyName_lc"].iat[name_idx].title()
                 
                 # Create column with teammate name
                 out_col = f"teammate_{i+1}_out_{teammate_name}"
-                export_df[out_col] = ~export_df["game_id"].isin(teammate_games)
+                export_df[out_col] = out_flags[:, i]
             else:
-                # personId-based identification
-                teammate_games = set(
-                    pbs_names[
-                        (pbs_names["personId"] == teammate_id) &
-                        (pbs_names["game_id"].isin(player_game_ids))
-                    ]["game_id"]
-                )
-                
                 # Get teammate name for column header
-                name_row = (
-                    pbs_names[pbs_names["personId"] == teammate_id]
-                    [["firstName", "familyName"]]
-                    .drop_duplicates()
-                    .iloc[0]
-                )
-                teammate_name = f"{name_row['firstName'].title()}_{name_row['familyName'].title()}"
+                name_idx = np.flatnonzero(pbs["personId"].to_numpy() == teammate_id)[0]
+                teammate_name = f"{pbs['firstName_lc'].iat[name_idx].title()}_{pbs['familyName_lc'].iat[name_idx].title()}"
                 
                 # Create column with teammate name
                 out_col = f"teammate_{i+1}_out_{teammate_name}"
-                export_df[out_col] = ~export_df["game_id"].isin(teammate_games)
+                export_df[out_col] = out_flags[:, i]
 
     # =========================================================
     # 7) Select and order columns for export
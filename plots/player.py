@@ -1,85 +1,76 @@
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+import altair as alt
 
-def plot_player_scoring(player_id, prop_line, pbs, tbs, daily_ranks, teammate_ids=None):
+from slices import player_game_slice, teammates_out
 
-    # =========================================================
-    # 1) Prepare player plotting dataframe
-    # =========================================================
-
-    plot_df = pbs[pbs["personId"] == player_id]
-
-    plot_df = (
-        plot_df
-        .sort_values(["game_date", "game_id"])
-        .reset_index(drop=True)
-    )
-
-    plot_df["game_number"] = np.arange(1, len(plot_df) + 1)
-    x = np.arange(len(plot_df))
-
-    plot_df["game_date_dt"] = pd.to_datetime(plot_df["game_date"])
+def build_player_scoring_df(player_id, pbs, tbs, daily_ranks, player_slice=None):
+    """
+    Player game rows for the scoring plots, with the opponent's defensive rank
+    as of the day before each game (opp_def_rank) and a game_number counter.
+    
+    Independent of the prop line, so callers can cache it per player / data version.
+    
+    Parameters:
+    -----------
+    player_id : int
+        Player personId
+    pbs : pd.DataFrame
+        Player box scores dataframe
+    tbs : pd.DataFrame
+        Team box scores dataframe
+    daily_ranks : pd.DataFrame
+        Daily team rankings dataframe with defensive ranks
+    player_slice : pd.DataFrame, optional
+        Precomputed player_game_slice(player_id, pbs, tbs); built here if not given
+    
+    Returns:
+    --------
+    pd.DataFrame
+    """
 
     # =========================================================
-    # 2) Build opponent lookup from TEAM box scores
+    # 1-2) Player games with opponent (shared player slice)
     # =========================================================
 
-    opp_lookup = (
-        tbs[["GAME_ID", "TEAM_ABBREVIATION"]]
-        .rename(columns={
-            "GAME_ID": "game_id",
-            "TEAM_ABBREVIATION": "team"
-        })
-    )
-
-    opp_lookup = (
-        opp_lookup
-        .merge(
-            opp_lookup,
-            on="game_id",
-            suffixes=("", "_opp")
-        )
-        .query("team != team_opp")
-        [["game_id", "team", "team_opp"]]
-        .drop_duplicates()
-        .rename(columns={"team_opp": "OPP_TEAM"})
-    )
-
-    team = plot_df["teamTricode"][0]
+    if player_slice is None:
+        player_slice = player_game_slice(player_id, pbs, tbs)
 
-    plot_df = plot_df.merge(
-        opp_lookup[opp_lookup["team"] == team][["game_id", "OPP_TEAM"]],
-        on="game_id",
-        how="left",
-        validate="one_to_one"
+    # Ranks are applied as of the day before each game: shift the (small) left
+    # key back a day rather than shifting every daily_ranks row forward
+    plot_df = player_slice.assign(
+        game_number=np.arange(1, len(player_slice) + 1),
+        rank_date=player_slice["game_date_dt"] - pd.Timedelta(days=1)
     )
 
     # =========================================================
     # 3) AS-OF MERGE opponent defensive rank
     # =========================================================
 
-    # Convert daily_ranks to match team_defense_daily structure
-    daily_ranks_plot = daily_ranks.copy()
-    daily_ranks_plot["as_of_date"] = pd.to_datetime(daily_ranks_plot["game_date"]) + pd.Timedelta(days=1)
-    
-    daily_ranks_plot = daily_ranks_plot.rename(
-        columns={"TEAM_ABBREVIATION": "OPP_TEAM"}
-    )
-
-    plot_df = plot_df.sort_values("game_date_dt")
-    daily_ranks_plot = daily_ranks_plot.sort_values("as_of_date")
-
+    # The slice is already in date order and build_ranks output is sorted by
+    # game_date, so daily_ranks goes in as-is (no copy / re-sort)
     plot_df = pd.merge_asof(
         plot_df,
-        daily_ranks_plot,
-        left_on="game_date_dt",
-        right_on="as_of_date",
-        by="OPP_TEAM",
+        daily_ranks,
+        left_on="rank_date",
+        right_on="game_date",
+        left_by="OPP_TEAM",
+        right_by="TEAM_ABBREVIATION",
+        suffixes=("", "_rank"),
         direction="backward"
     )
 
-    plot_df = plot_df.rename(columns={"def_rank": "opp_def_rank"})
+    return plot_df.rename(columns={"def_rank": "opp_def_rank"})
+
+def plot_player_scoring(player_id, prop_line, pbs, tbs, daily_ranks, teammate_ids=None, player_slice=None, ax=None, played_lookup=None):
+
+    # =========================================================
+    # 1-3) Player games + opponent defensive rank
+    # =========================================================
+
+    plot_df = build_player_scoring_df(player_id, pbs, tbs, daily_ranks, player_slice=player_slice)
+    x = np.arange(len(plot_df))
 
     # =========================================================
     # 4) Bar colors (prop logic)
@@ -95,7 +86,13 @@ def plot_player_scoring(player_id, prop_line, pbs, tbs, daily_ranks, teammate_id
     # 5) Plot
     # =========================================================
 
-    fig, ax = plt.subplots(figsize=(15, 6))
+    if ax is None:
+        fig = Figure(figsize=(15, 6))
+        ax = fig.subplots()
+        owns_fig = True
+    else:
+        fig = ax.figure
+        owns_fig = False
 
     # Create bars with increased width
     bar_width = 0.8
@@ -153,57 +150,27 @@ def plot_player_scoring(player_id, prop_line, pbs, tbs, daily_ranks, teammate_id
     # 7) Teammate absence markers
     # =========================================================
 
-    pbs_names = pbs.copy()
-    pbs_names["firstName"] = pbs_names["firstName"].str.lower()
-    pbs_names["familyName"] = pbs_names["familyName"].str.lower()
-
-    player_game_ids = set(plot_df["game_id"])
-
     # Visual config (cycled if 2 teammates)
     markers = ["^", "s"]
     colors = ["tab:blue", "tab:purple"]
     y_offsets = [2.0, 3.2]
 
     if teammate_ids is not None:
+        # All teammates' absence flags from one played lookup
+        out_flags = teammates_out(plot_df["game_id"], teammate_ids, pbs, played_lookup)
+
         for i, teammate_id in enumerate(teammate_ids):
+            out_col = f"teammate_{i}_out"
+            plot_df[out_col] = out_flags[:, i]
+
             if isinstance(teammate_id, str):
-                # Name-based identification (e.g., "reaves")
-                teammate_games = set(
-                    pbs_names[
-                        (pbs_names["familyName"] == teammate_id.lower()) &
-                        (pbs_names["game_id"].isin(player_game_ids))
-                    ]["game_id"]
-                )
-                out_col = f"teammate_{i}_out"
-                plot_df[out_col] = ~plot_df["game_id"].isin(teammate_games)
-                
                 # Get teammate name for legend
-                name_row = (
-                    pbs_names[pbs_names["familyName"] == teammate_id.lower()]
-                    [["firstName", "familyName"]]
-                    .drop_duplicates()
-                    .iloc[0]
-                )
-                teammate_name = f"{name_row['familyName'].title()}"
+                name_idx = np.flatnonzero(pbs["familyName_lc"].to_numpy() == teammate_id.lower())[0]
+                teammate_name = pbs["familyName_lc"].iat[name_idx].title()
             else:
-                # personId-based identification
-                teammate_games = set(
-                    pbs_names[
-                        (pbs_names["personId"] == teammate_id) &
-                        (pbs_names["game_id"].isin(player_game_ids))
-                    ]["game_id"]
-                )
-                out_col = f"teammate_{i}_out"
-                plot_df[out_col] = ~plot_df["game_id"].isin(teammate_games)
-                
                 # Get teammate name for legend
-                name_row = (
-                    pbs_names[pbs_names["personId"] == teammate_id]
-                    [["firstName", "familyName"]]
-                    .drop_duplicates()
-                    .iloc[0]
-                )
-                teammate_name = f"{name_row['firstName'].title()} {name_row['familyName'].title()}"
+                name_idx = np.flatnonzero(pbs["personId"].to_numpy() == teammate_id)[0]
+                teammate_name = f"{pbs['firstName_lc'].iat[name_idx].title()} {pbs['familyName_lc'].iat[name_idx].title()}"
             
             ax.scatter(
                 x[plot_df[out_col]],
@@ -218,41 +185,37 @@ def plot_player_scoring(player_id, prop_line, pbs, tbs, daily_ranks, teammate_id
     # 8) Opponent team + defensive rank labels (BOTTOM)
     # =========================================================
 
-    for i, row in plot_df.iterrows():
-        if not pd.isna(row["opp_def_rank"]):
-            ax.text(
-                i,
-                10.2,
-                f'{row["OPP_TEAM"]}',
-                ha="center",
-                va="bottom",
-                fontsize=16,
-                alpha=0.85
-            )
-            ax.text(
-                i,
-                11.2,
-                f'#{int(row["opp_def_rank"])}',
-                ha="center",
-                va="bottom",
-                fontsize=18,
-                fontweight="bold",
-                alpha=0.9
-            )
+    # Only games with a rank get labels; walk that subset as plain arrays
+    has_rank = plot_df["opp_def_rank"].notna().to_numpy()
+    for i, opp_team, rank in zip(
+        plot_df.index[has_rank],
+        plot_df["OPP_TEAM"].to_numpy()[has_rank],
+        plot_df["opp_def_rank"].to_numpy()[has_rank]
+    ):
+        ax.text(
+            i,
+            10.2,
+            f'{opp_team}',
+            ha="center",
+            va="bottom",
+            fontsize=16,
+            alpha=0.85
+        )
+        ax.text(
+            i,
+            11.2,
+            f'#{int(rank)}',
+            ha="center",
+            va="bottom",
+            fontsize=18,
+            fontweight="bold",
+            alpha=0.9
+        )
 
     # =========================================================
     # 9) Formatting
     # =========================================================
 
-    # Get player name for dynamic title
-    player_name_row = (
-        pbs[pbs["personId"] == player_id]
-        [["firstName", "familyName"]]
-        .drop_duplicates()
-        .iloc[0]
-    )
-    player_name = f"{player_name_row['firstName']} {player_name_row['familyName']}"
-
     ax.set_ylim(10, plot_df["points"].max() + 5)
     ax.set_ylabel("Points", fontsize=22, fontweight="bold")
     # Remove x-axis label and ticks - not needed
@@ -281,31 +244,16 @@ def plot_player_scoring(player_id, prop_line, pbs, tbs, daily_ranks, teammate_id
     
     # Add teammate markers if applicable
     if teammate_ids is not None and len(teammate_ids) > 0:
-        pbs_names = pbs.copy()
-        pbs_names["firstName"] = pbs_names["firstName"].str.lower()
-        pbs_names["familyName"] = pbs_names["familyName"].str.lower()
-        player_game_ids = set(plot_df["game_id"])
-        
         markers = ["^", "s"]
         colors = ["tab:blue", "tab:purple"]
         
         for i, teammate_id in enumerate(teammate_ids):
             if isinstance(teammate_id, str):
-                name_row = (
-                    pbs_names[pbs_names["familyName"] == teammate_id.lower()]
-                    [["firstName", "familyName"]]
-                    .drop_duplicates()
-                    .iloc[0]
-                )
-                teammate_name = f"{name_row['familyName'].title()}"
+                name_idx = np.flatnonzero(pbs["familyName_lc"].to_numpy() == teammate_id.lower())[0]
+                teammate_name = pbs["familyName_lc"].iat[name_idx].title()
             else:
-                name_row = (
-                    pbs_names[pbs_names["personId"] == teammate_id]
-                    [["firstName", "familyName"]]
-                    .drop_duplicates()
-                    .iloc[0]
-                )
-                teammate_name = f"{name_row['firstName'].title()} {name_row['familyName'].title()}"
+                name_idx = np.flatnonzero(pbs["personId"].to_numpy() == teammate_id)[0]
+                teammate_name = f"{pbs['firstName_lc'].iat[name_idx].title()} {pbs['familyName_lc'].iat[name_idx].title()}"
             
             legend_elements.append(
                 Line2D([0], [0], marker=markers[i], color=colors[i], linestyle='None', 
@@ -321,11 +269,101 @@ def plot_player_scoring(player_id, prop_line, pbs, tbs, daily_ranks, teammate_id
         handletextpad=1.0
     )
 
-    plt.tight_layout()
+    if owns_fig:
+        fig.tight_layout()
 
     return fig, ax
 
-def plot_player_scoring_by_def_bucket(player_id, prop_line, pbs, tbs, daily_ranks, opp_def_bucket, teammate_ids=None):
+def player_scoring_chart(plot_df, prop_line, height=520):
+    """
+    Altair (Vega-Lite) version of plot_player_scoring for the dashboard.
+    
+    Drawn in the browser, so the server only ships the small per-game dataframe
+    instead of rasterizing a large Matplotlib figure on every prop line change.
+    Teammate absence markers are not drawn here (use plot_player_scoring).
+    
+    Parameters:
+    -----------
+    plot_df : pd.DataFrame
+        Output of build_player_scoring_df()
+    prop_line : float
+        Prop line threshold (e.g., 29.5)
+    height : int
+        Chart height in pixels (width follows the container)
+    
+    Returns:
+    --------
+    alt.LayerChart
+    """
+
+    chart_df = plot_df[[
+        "game_number", "game_date_dt", "OPP_TEAM", "opp_def_rank",
+        "points", "minutes", "szn_avg_ppg", "r10_avg_ppg"
+    ]].assign(
+        over=plot_df["points"] >= prop_line,
+        low_min=plot_df["minutes"] <= 30,
+        rank_label="#" + plot_df["opp_def_rank"].astype("Int64").astype(str),
+    )
+
+    y_max = float(chart_df["points"].max()) + 5
+    x_enc = alt.X("game_number:O", axis=None)
+    y_scale = alt.Scale(domain=[10, y_max])
+
+    base = alt.Chart(chart_df)
+
+    # Bars colored by prop outcome (same green/red as the Matplotlib version)
+    bars = base.mark_bar(opacity=0.75, clip=True).encode(
+        x=x_enc,
+        y=alt.Y("points:Q", scale=y_scale, title="Points"),
+        color=alt.condition(
+            alt.datum.over,
+            alt.value("#2ca02c"),
+            alt.value("#d62728")
+        ),
+        tooltip=[
+            alt.Tooltip("game_date_dt:T", title="Date"),
+            alt.Tooltip("OPP_TEAM:N", title="Opp"),
+            alt.Tooltip("opp_def_rank:Q", title="Opp Def Rank"),
+            alt.Tooltip("points:Q", title="PTS"),
+            alt.Tooltip("minutes:Q", title="MIN", format=".1f"),
+        ]
+    )
+
+    r10_line = base.mark_line(strokeDash=[2, 3], strokeWidth=3, color="#1f77b4").encode(
+        x=x_enc, y=alt.Y("r10_avg_ppg:Q", scale=y_scale)
+    )
+    szn_line = base.mark_line(strokeDash=[6, 4], strokeWidth=1.8, opacity=0.7, color="#ff7f0e").encode(
+        x=x_enc, y=alt.Y("szn_avg_ppg:Q", scale=y_scale)
+    )
+
+    prop_rule = alt.Chart(pd.DataFrame({"prop_line": [prop_line]})).mark_rule(
+        strokeDash=[8, 6], strokeWidth=5, color="black", opacity=0.9
+    ).encode(y=alt.Y("prop_line:Q", scale=y_scale))
+
+    # Low minutes marker (≤30)
+    low_min = base.transform_filter(alt.datum.low_min).transform_calculate(
+        marker_y="datum.points + 1"
+    ).mark_point(shape="cross", angle=45, size=150, strokeWidth=4, color="black").encode(
+        x=x_enc, y=alt.Y("marker_y:Q", scale=y_scale)
+    )
+
+    # Opponent team + defensive rank labels (bottom)
+    ranked = base.transform_filter("isValid(datum.opp_def_rank)")
+    opp_labels = ranked.mark_text(baseline="bottom", fontSize=13, opacity=0.85).encode(
+        x=x_enc, y=alt.datum(10.2), text="OPP_TEAM:N"
+    )
+    rank_labels = ranked.mark_text(baseline="bottom", fontSize=14, fontWeight="bold", opacity=0.9).encode(
+        x=x_enc, y=alt.datum(11.2), text="rank_label:N"
+    )
+
+    return (
+        alt.layer(bars, r10_line, szn_line, prop_rule, low_min, opp_labels, rank_labels)
+        .properties(height=height)
+        .configure_view(stroke=None)
+        .configure_axisY(grid=True, gridOpacity=0.25, labelFontSize=14, titleFontSize=18)
+    )
+
+def plot_player_scoring_by_def_bucket(player_id, prop_line, pbs, tbs, daily_ranks, opp_def_bucket, teammate_ids=None, player_slice=None, ax=None, played_lookup=None):
     """
     Plot a player's scoring outcomes filtered by opponent defensive bucket.
     Same output as plot_player_scoring() but only shows games where opponent
@@ -349,6 +387,12 @@ def plot_player_scoring_by_def_bucket(player_id, prop_line, pbs, tbs, daily_rank
         - Tuple: (min_rank, max_rank) for custom range (e.g., (1, 10), (11, 20))
     teammate_ids : list, optional
         List of teammate identifiers (personId int or familyName str) to track absence
+    player_slice : pd.DataFrame, optional
+        Precomputed player_game_slice(player_id, pbs, tbs); built here if not given
+    ax : matplotlib.axes.Axes, optional
+        Existing axis to draw into (e.g. a gridspec cell); a new figure is created if not given
+    played_lookup : pd.DataFrame, optional
+        Precomputed slices.build_played_lookup(pbs) for the teammate flags
     
     Returns:
     --------
@@ -357,78 +401,18 @@ def plot_player_scoring_by_def_bucket(player_id, prop_line, pbs, tbs, daily_rank
     """
     
     # =========================================================
-    # 1) Prepare player plotting dataframe (same as plot_player_scoring)
-    # =========================================================
-
-    plot_df = pbs[pbs["personId"] == player_id]
-
-    plot_df = (
-        plot_df
-        .sort_values(["game_date", "game_id"])
-        .reset_index(drop=True)
-    )
-
-    plot_df["game_date_dt"] = pd.to_datetime(plot_df["game_date"])
-
-    # =========================================================
-    # 2) Build opponent lookup from TEAM box scores
+    # 1-2) Player games with opponent (shared player slice)
     # =========================================================
 
-    opp_lookup = (
-        tbs[["GAME_ID", "TEAM_ABBREVIATION"]]
-        .rename(columns={
-            "GAME_ID": "game_id",
-            "TEAM_ABBREVIATION": "team"
-        })
-    )
-
-    opp_lookup = (
-        opp_lookup
-        .merge(
-            opp_lookup,
-            on="game_id",
-            suffixes=("", "_opp")
-        )
-        .query("team != team_opp")
-        [["game_id", "team", "team_opp"]]
-        .drop_duplicates()
-        .rename(columns={"team_opp": "OPP_TEAM"})
-    )
-
-    team = plot_df["teamTricode"][0]
-
-    plot_df = plot_df.merge(
-        opp_lookup[opp_lookup["team"] == team][["game_id", "OPP_TEAM"]],
-        on="game_id",
-        how="left",
-        validate="one_to_one"
-    )
+    if player_slice is None:
+        player_slice = player_game_slice(player_id, pbs, tbs)
 
     # =========================================================
     # 3) AS-OF MERGE opponent defensive rank
     # =========================================================
 
-    # Convert daily_ranks to match team_defense_daily structure
-    daily_ranks_plot = daily_ranks.copy()
-    daily_ranks_plot["as_of_date"] = pd.to_datetime(daily_ranks_plot["game_date"]) + pd.Timedelta(days=1)
-    
-    daily_ranks_plot = daily_ranks_plot.rename(
-        columns={"TEAM_ABBREVIATION": "OPP_TEAM"}
-    )
-
-    plot_df = plot_df.sort_values("game_date_dt")
-    daily_ranks_plot = daily_ranks_plot.sort_values("as_of_date")
-
-    plot_df = pd.merge_asof(
-        plot_df,
-        daily_ranks_plot,
-        left_on="game_date_dt",
-        right_on="as_of_date",
-        by="OPP_TEAM",
-        direction="backward"
-    )
-
-    plot_df = plot_df.rename(columns={"def_rank": "opp_def_rank"})
+    # Same day-before ranks as plot_player_scoring (daily_ranks merged as-is)
+    plot_df = build_player_scoring_df(player_id, pbs, tbs, daily_ranks, player_slice)
 
     # =========================================================
     # 4) Filter by opponent defensive bucket
@@ -486,7 +470,13 @@ def plot_player_scoring_by_def_bucket(player_id, prop_line, pbs, tbs, daily_rank
     # 6) Plot
     # =========================================================
 
-    fig, ax = plt.subplots(figsize=(15, 6))
+    if ax is None:
+        fig = Figure(figsize=(15, 6))
+        ax = fig.subplots()
+        owns_fig = True
+    else:
+        fig = ax.figure
+        owns_fig = False
 
     ax.bar(
         x,
@@ -542,57 +532,27 @@ def plot_player_scoring_by_def_bucket(player_id, prop_line, pbs, tbs, daily_rank
     # 8) Teammate absence markers
     # =========================================================
 
-    pbs_names = pbs.copy()
-    pbs_names["firstName"] = pbs_names["firstName"].str.lower()
-    pbs_names["familyName"] = pbs_names["familyName"].str.lower()
-
-    player_game_ids = set(plot_df["game_id"])
-
     # Visual config (cycled if 2 teammates)
     markers = ["^", "s"]
     colors = ["tab:blue", "tab:purple"]
     y_offsets = [2.0, 3.2]
 
     if teammate_ids is not None:
+        # All teammates' absence flags from one played lookup
+        out_flags = teammates_out(plot_df["game_id"], teammate_ids, pbs, played_lookup)
+
         for i, teammate_id in enumerate(teammate_ids):
+            out_col = f"teammate_{i}_out"
+            plot_df[out_col] = out_flags[:, i]
+
             if isinstance(teammate_id, str):
-                # Name-based identification (e.g., "reaves")
-                teammate_games = set(
-                    pbs_names[
-                        (pbs_names["familyName"] == teammate_id.lower()) &
-                        (pbs_names["game_id"].isin(player_game_ids))
-                    ]["game_id"]
-                )
-                out_col = f"teammate_{i}_out"
-                plot_df[out_col] = ~plot_df["game_id"].isin(teammate_games)
-                
                 # Get teammate name for legend
-                name_row = (
-                    pbs_names[pbs_names["familyName"] == teammate_id.lower()]
-                    [["firstName", "familyName"]]
-                    .drop_duplicates()
-                    .iloc[0]
-                )
-                teammate_name = f"{name_row['familyName'].title()}"
+                name_idx = np.flatnonzero(pbs["familyName_lc"].to_numpy() == teammate_id.lower())[0]
+                teammate_name = pbs["familyName_lc"].iat[name_idx].title()
             else:
-                # personId-based identification
-                teammate_games = set(
-                    pbs_names[
-                        (pbs_names["personId"] == teammate_id) &
-                        (pbs_names["game_id"].isin(player_game_ids))
-                    ]["game_id"]
-                )
-                out_col = f"teammate_{i}_out"
-                plot_df[out_col] = ~plot_df["game_id"].isin(teammate_games)
-                
                 # Get teammate name for legend
-                name_row = (
-                    pbs_names[pbs_names["personId"] == teammate_id]
-                    [["firstName", "familyName"]]
-                    .drop_duplicates()
-                    .iloc[0]
-                )
-                teammate_name = f"{name_row['firstName'].title()} {name_row['familyName'].title()}"
+                name_idx = np.flatnonzero(pbs["personId"].to_numpy() == teammate_id)[0]
+                teammate_name = f"{pbs['firstName_lc'].iat[name_idx].title()} {pbs['familyName_lc'].iat[name_idx].title()}"
             
             ax.scatter(
                 x[plot_df[out_col]],
@@ -607,40 +567,39 @@ def plot_player_scoring_by_def_bucket(player_id, prop_line, pbs, tbs, daily_rank
     # 9) Opponent team + defensive rank labels (BOTTOM)
     # =========================================================
 
-    for i, row in plot_df.iterrows():
-        if not pd.isna(row["opp_def_rank"]):
-            ax.text(
-                i,
-                10.2,
-                f'{row["OPP_TEAM"]}',
-                ha="center",
-                va="bottom",
-                fontsize=8,
-                alpha=0.85
-            )
-            ax.text(
-                i,
-                11.2,
-                f'#{int(row["opp_def_rank"])}',
-                ha="center",
-                va="bottom",
-                fontsize=9,
-                fontweight="bold",
-                alpha=0.9
-            )
+    # Only games with a rank get labels; walk that subset as plain arrays
+    has_rank = plot_df["opp_def_rank"].notna().to_numpy()
+    for i, opp_team, rank in zip(
+        plot_df.index[has_rank],
+        plot_df["OPP_TEAM"].to_numpy()[has_rank],
+        plot_df["opp_def_rank"].to_numpy()[has_rank]
+    ):
+        ax.text(
+            i,
+            10.2,
+            f'{opp_team}',
+            ha="center",
+            va="bottom",
+            fontsize=8,
+            alpha=0.85
+        )
+        ax.text(
+            i,
+            11.2,
+            f'#{int(rank)}',
+            ha="center",
+            va="bottom",
+            fontsize=9,
+            fontweight="bold",
+            alpha=0.9
+        )
 
     # =========================================================
     # 10) Formatting
     # =========================================================
 
-    # Get player name for dynamic title
-    player_name_row = (
-        pbs[pbs["personId"] == player_id]
-        [["firstName", "familyName"]]
-        .drop_duplicates()
-        .iloc[0]
-    )
-    player_name = f"{player_name_row['firstName']} {player_name_row['familyName']}"
+    # Get player name for dynamic title (bucket filter may leave plot_df empty)
+    player_name = f"{player_slice['firstName'].iat[0]} {player_slice['familyName'].iat[0]}"
 
     ax.set_ylim(10, plot_df["points"].max() + 5)
     ax.set_ylabel("Points")
@@ -659,11 +618,12 @@ def plot_player_scoring_by_def_bucket(player_id, prop_line, pbs, tbs, daily_rank
         handletextpad=0.6
     )
 
-    plt.tight_layout()
+    if owns_fig:
+        fig.tight_layout()
 
     return fig, ax
 
-def plot_player_team_points_overlap(player_id, pbs, tbs, daily_ranks, teammate_ids=None):
+def plot_player_team_points_overlap(player_id, pbs, tbs, daily_ranks, teammate_ids=None, player_slice=None, ax=None, played_lookup=None):
     """
     Plot a player's points vs team total points with overlapping bars and season averages.
     
@@ -679,6 +639,12 @@ def plot_player_team_points_overlap(player_id, pbs, tbs, daily_ranks, teammate_i
         Daily team rankings dataframe with defensive ranks
     teammate_ids : list, optional
         List of teammate identifiers (personId int or familyName str) to track absence
+    player_slice : pd.DataFrame, optional
+        Precomputed player_game_slice(player_id, pbs, tbs); built here if not given
+    ax : matplotlib.axes.Axes, optional
+        Existing axis to draw into (e.g. a gridspec cell); a new figure is created if not given
+    played_lookup : pd.DataFrame, optional
+        Precomputed slices.build_played_lookup(pbs) for the teammate flags
     """
     
     if teammate_ids is None:
@@ -687,44 +653,16 @@ def plot_player_team_points_overlap(player_id, pbs, tbs, daily_ranks, teammate_i
         raise ValueError("Max 2 teammates allowed (visual clarity).")
     
     # =========================================================
-    # 1) Build player-game dataframe
-    # =========================================================
-    
-    player_df = pbs[pbs["personId"] == player_id].copy()
-    player_df = player_df.sort_values(["game_date", "game_id"]).reset_index(drop=True)
-    
-    # Get player's team
-    team_abbrev = player_df["teamTricode"].iloc[0]
-    
-    # =========================================================
-    # 2) Get team points for those games
+    # 1-3) Player games with team points + opponent (shared player slice)
     # =========================================================
     
-    team_pts_df = (
-        tbs[tbs["TEAM_ABBREVIATION"] == team_abbrev]
-        [["GAME_ID", "GAME_DATE", "PTS", "MATCHUP"]]
-        .rename(columns={
-            "GAME_ID": "game_id",
-            "GAME_DATE": "game_date",
-            "PTS": "team_pts"
-        })
-    )
-    
-    # Merge player with team points
-    plot_df = player_df.merge(
-        team_pts_df,
-        on=["game_id", "game_date"],
-        how="left",
-        validate="one_to_one"
-    )
+    if player_slice is None:
+        player_slice = player_game_slice(player_id, pbs, tbs)
     
-    # =========================================================
-    # 3) Opponent team abbreviation
-    # =========================================================
+    plot_df = player_slice.copy()
     
-    plot_df["OPP_TEAM"] = plot_df["MATCHUP"].str[-3:]
-    plot_df["GAME_DATE_DT"] = pd.to_datetime(plot_df["game_date"])
-    plot_df = plot_df.sort_values("GAME_DATE_DT").reset_index(drop=True)
+    # Get player's team
+    team_abbrev = plot_df["teamTricode"].iloc[0]
     
     # =========================================================
     # 4) Calculate player season averages (no leakage)
@@ -748,19 +686,16 @@ def plot_player_team_points_overlap(player_id, pbs, tbs, daily_ranks, teammate_i
     # 5) Attach opponent defensive rank (as of game date)
     # =========================================================
     
-    daily_ranks_plot = daily_ranks.copy()
-    daily_ranks_plot["game_date_dt"] = pd.to_datetime(daily_ranks_plot["game_date"])
-    
-    plot_df = plot_df.sort_values("GAME_DATE_DT")
-    daily_ranks_plot = daily_ranks_plot.sort_values("game_date_dt")
-    
+    # The slice is already in date order and daily_ranks is sorted by
+    # game_date, so it goes in as-is (no copy / re-sort)
     plot_df = pd.merge_asof(
         plot_df,
-        daily_ranks_plot,
-        left_on="GAME_DATE_DT",
-        right_on="game_date_dt",
+        daily_ranks,
+        left_on="game_date_dt",
+        right_on="game_date",
         left_by="OPP_TEAM",
         right_by="TEAM_ABBREVIATION",
+        suffixes=("", "_rank"),
         direction="backward"
     )
     
@@ -768,11 +703,6 @@ def plot_player_team_points_overlap(player_id, pbs, tbs, daily_ranks, teammate_i
     # 6) Teammate absence markers
     # =========================================================
     
-    pbs_names = pbs.copy()
-    pbs_names["familyName"] = pbs_names["familyName"].str.lower()
-    
-    player_game_ids = set(plot_df["game_id"])
-    
     # Visual config (cycled if 2 teammates)
     markers = ["^", "s"]
     colors = ["orange", "purple"]
@@ -782,45 +712,21 @@ def plot_player_team_points_overlap(player_id, pbs, tbs, daily_ranks, teammate_i
     teammate_names = []
     
     if teammate_ids:
+        # All teammates' absence flags from one played lookup
+        out_flags = teammates_out(plot_df["game_id"], teammate_ids, pbs, played_lookup)
+
         for i, teammate_id in enumerate(teammate_ids):
+            out_col = f"teammate_{i}_out"
+            plot_df[out_col] = out_flags[:, i]
+
             if isinstance(teammate_id, str):
-                # Name-based identification (e.g., "reaves")
-                teammate_games = set(
-                    pbs_names[
-                        (pbs_names["familyName"] == teammate_id.lower()) &
-                        (pbs_names["game_id"].isin(player_game_ids))
-                    ]["game_id"]
-                )
-                out_col = f"teammate_{i}_out"
-                plot_df[out_col] = ~plot_df["game_id"].isin(teammate_games)
-                
                 # Get teammate name for legend
-                name_row = (
-                    pbs_names[pbs_names["familyName"] == teammate_id.lower()]
-                    [["familyName"]]
-                    .drop_duplicates()
-                    .iloc[0]
-                )
-                teammate_name = name_row['familyName'].title()
+                name_idx = np.flatnonzero(pbs["familyName_lc"].to_numpy() == teammate_id.lower())[0]
+                teammate_name = pbs["familyName_lc"].iat[name_idx].title()
             else:
-                # personId-based identification
-                teammate_games = set(
-                    pbs_names[
-                        (pbs_names["personId"] == teammate_id) &
-                        (pbs_names["game_id"].isin(player_game_ids))
-                    ]["game_id"]
-                )
-                out_col = f"teammate_{i}_out"
-                plot_df[out_col] = ~plot_df["game_id"].isin(teammate_games)
-                
                 # Get teammate name for legend
-                name_row = (
-                    pbs_names[pbs_names["personId"] == teammate_id]
-                    [["firstName", "familyName"]]
-                    .drop_duplicates()
-                    .iloc[0]
-                )
-                teammate_name = f"{name_row['firstName'].title()} {name_row['familyName'].title()}"
+                name_idx = np.flatnonzero(pbs["personId"].to_numpy() == teammate_id)[0]
+                teammate_name = f"{pbs['firstName_lc'].iat[name_idx].title()} {pbs['familyName_lc'].iat[name_idx].title()}"
             
             teammate_out_cols.append(out_col)
             teammate_names.append(teammate_name)
@@ -831,7 +737,13 @@ def plot_player_team_points_overlap(player_id, pbs, tbs, daily_ranks, teammate_i
     
     x = np.arange(len(plot_df))
     
-    fig, ax = plt.subplots(figsize=(15, 6))
+    if ax is None:
+        fig = Figure(figsize=(15, 6))
+        ax = fig.subplots()
+        owns_fig = True
+    else:
+        fig = ax.figure
+        owns_fig = False
     
     # -----------------------------
     # Bars: TEAM points (background)
@@ -848,7 +760,7 @@ def plot_player_team_points_overlap(player_id, pbs, tbs, daily_ranks, teammate_i
     # -----------------------------
     # Bars: PLAYER points (foreground)
     # -----------------------------
-    player_name = f"{player_df['firstName'].iloc[0]} {player_df['familyName'].iloc[0]}"
+    player_name = f"{plot_df['firstName'].iloc[0]} {plot_df['familyName'].iloc[0]}"
     ax.bar(
         x,
         plot_df["points"],
@@ -901,18 +813,22 @@ def plot_player_team_points_overlap(player_id, pbs, tbs, daily_ranks, teammate_i
     # -----------------------------
     # Bottom labels: opponent + DEF rank
     # -----------------------------
-    for i, row in plot_df.iterrows():
-        if pd.notna(row.get("def_rank")):
-            ax.text(
-                i,
-                5,
-                f'{row["OPP_TEAM"]}\n#{int(row["def_rank"])}',
-                ha="center",
-                va="bottom",
-                color="white",
-                fontsize=8,
-                alpha=0.85
-            )
+    has_rank = plot_df["def_rank"].notna().to_numpy()
+    for i, opp_team, rank in zip(
+        plot_df.index[has_rank],
+        plot_df["OPP_TEAM"].to_numpy()[has_rank],
+        plot_df["def_rank"].to_numpy()[has_rank]
+    ):
+        ax.text(
+            i,
+            5,
+            f'{opp_team}\n#{int(rank)}',
+            ha="center",
+            va="bottom",
+            color="white",
+            fontsize=8,
+            alpha=0.85
+        )
     
     # -----------------------------
     # Formatting
@@ -931,12 +847,12 @@ def plot_player_team_points_overlap(player_id, pbs, tbs, daily_ranks, teammate_i
         fontsize=10
     )
     
-    plt.tight_layout()
-    plt.show()
+    if owns_fig:
+        fig.tight_layout()
     
     return fig, ax
 
-def plot_player_pct_team_points(player_id, pbs, tbs, daily_ranks, teammate_ids=None):
+def plot_player_pct_team_points(player_id, pbs, tbs, daily_ranks, teammate_ids=None, player_slice=None, ax=None, played_lookup=None):
     """
     Plot a player's percentage of team points by game with season averages and opponent defensive ranks.
     
@@ -952,6 +868,12 @@ def plot_player_pct_team_points(player_id, pbs, tbs, daily_ranks, teammate_ids=N
         Daily team rankings dataframe with defensive ranks
     teammate_ids : list, optional
         List of teammate identifiers (personId int or familyName str) to track absence
+    player_slice : pd.DataFrame, optional
+        Precomputed player_game_slice(player_id, pbs, tbs); built here if not given
+    ax : matplotlib.axes.Axes, optional
+        Existing axis to draw into (e.g. a gridspec cell); a new figure is created if not given
+    played_lookup : pd.DataFrame, optional
+        Precomputed slices.build_played_lookup(pbs) for the teammate flags
     """
     
     if teammate_ids is None:
@@ -960,44 +882,16 @@ def plot_player_pct_team_points(player_id, pbs, tbs, daily_ranks, teammate_ids=N
         raise ValueError("Max 2 teammates allowed (visual clarity).")
     
     # =========================================================
-    # 1) Build player-game dataframe
-    # =========================================================
-    
-    player_df = pbs[pbs["personId"] == player_id].copy()
-    player_df = player_df.sort_values(["game_date", "game_id"]).reset_index(drop=True)
-    
-    # Get player's team
-    team_abbrev = player_df["teamTricode"].iloc[0]
-    
-    # =========================================================
-    # 2) Get team points for those games
+    # 1-3) Player games with team points + opponent (shared player slice)
     # =========================================================
     
-    team_pts_df = (
-        tbs[tbs["TEAM_ABBREVIATION"] == team_abbrev]
-        [["GAME_ID", "GAME_DATE", "PTS", "MATCHUP"]]
-        .rename(columns={
-            "GAME_ID": "game_id",
-            "GAME_DATE": "game_date",
-            "PTS": "team_pts"
-        })
-    )
-    
-    # Merge player with team points
-    plot_df = player_df.merge(
-        team_pts_df,
-        on=["game_id", "game_date"],
-        how="left",
-        validate="one_to_one"
-    )
+    if player_slice is None:
+        player_slice = player_game_slice(player_id, pbs, tbs)
     
-    # =========================================================
-    # 3) Opponent team abbreviation
-    # =========================================================
+    plot_df = player_slice.copy()
     
-    plot_df["OPP_TEAM"] = plot_df["MATCHUP"].str[-3:]
-    plot_df["GAME_DATE_DT"] = pd.to_datetime(plot_df["game_date"])
-    plot_df = plot_df.sort_values("GAME_DATE_DT").reset_index(drop=True)
+    # Get player's team
+    team_abbrev = plot_df["teamTricode"].iloc[0]
     
     # =========================================================
     # 4) Calculate percentage of team points
@@ -1025,19 +919,16 @@ def plot_player_pct_team_points(player_id, pbs, tbs, daily_ranks, teammate_ids=N
     # 5) Attach opponent defensive rank (as of game date)
     # =========================================================
     
-    daily_ranks_plot = daily_ranks.copy()
-    daily_ranks_plot["game_date_dt"] = pd.to_datetime(daily_ranks_plot["game_date"])
-    
-    plot_df = plot_df.sort_values("GAME_DATE_DT")
-    daily_ranks_plot = daily_ranks_plot.sort_values("game_date_dt")
-    
+    # The slice is already in date order and daily_ranks is sorted by
+    # game_date, so it goes in as-is (no copy / re-sort)
     plot_df = pd.merge_asof(
         plot_df,
-        daily_ranks_plot,
-        left_on="GAME_DATE_DT",
-        right_on="game_date_dt",
+        daily_ranks,
+        left_on="game_date_dt",
+        right_on="game_date",
         left_by="OPP_TEAM",
         right_by="TEAM_ABBREVIATION",
+        suffixes=("", "_rank"),
         direction="backward"
     )
     
@@ -1045,11 +936,6 @@ def plot_player_pct_team_points(player_id, pbs, tbs, daily_ranks, teammate_ids=N
     # 6) Teammate absence markers
     # =========================================================
     
-    pbs_names = pbs.copy()
-    pbs_names["familyName"] = pbs_names["familyName"].str.lower()
-    
-    player_game_ids = set(plot_df["game_id"])
-    
     # Visual config (cycled if 2 teammates)
     markers = ["^", "s"]
     colors = ["tab:orange", "tab:purple"]
@@ -1059,45 +945,21 @@ def plot_player_pct_team_points(player_id, pbs, tbs, daily_ranks, teammate_ids=N
     teammate_names = []
     
     if teammate_ids:
+        # All teammates' absence flags from one played lookup
+        out_flags = teammates_out(plot_df["game_id"], teammate_ids, pbs, played_lookup)
+
         for i, teammate_id in enumerate(teammate_ids):
+            out_col = f"teammate_{i}_out"
+            plot_df[out_col] = out_flags[:, i]
+
             if isinstance(teammate_id, str):
-                # Name-based identification (e.g., "reaves")
-                teammate_games = set(
-                    pbs_names[
-                        (pbs_names["familyName"] == teammate_id.lower()) &
-                        (pbs_names["game_id"].isin(player_game_ids))
-                    ]["game_id"]
-                )
-                out_col = f"teammate_{i}_out"
-                plot_df[out_col] = ~plot_df["game_id"].isin(teammate_games)
-                
                 # Get teammate name for legend
-                name_row = (
-                    pbs_names[pbs_names["familyName"] == teammate_id.lower()]
-                    [["familyName"]]
-                    .drop_duplicates()
-                    .iloc[0]
-                )
-                teammate_name = name_row['familyName'].title()
+                name_idx = np.flatnonzero(pbs["familyName_lc"].to_numpy() == teammate_id.lower())[0]
+                teammate_name = pbs["familyName_lc"].iat[name_idx].title()
             else:
-                # personId-based identification
-                teammate_games = set(
-                    pbs_names[
-                        (pbs_names["personId"] == teammate_id) &
-                        (pbs_names["game_id"].isin(player_game_ids))
-                    ]["game_id"]
-                )
-                out_col = f"teammate_{i}_out"
-                plot_df[out_col] = ~plot_df["game_id"].isin(teammate_games)
-                
                 # Get teammate name for legend
-                name_row = (
-                    pbs_names[pbs_names["personId"] == teammate_id]
-                    [["firstName", "familyName"]]
-                    .drop_duplicates()
-                    .iloc[0]
-                )
-                teammate_name = f"{name_row['firstName'].title()} {name_row['familyName'].title()}"
+                name_idx = np.flatnonzero(pbs["personId"].to_numpy() == teammate_id)[0]
+                teammate_name = f"{pbs['firstName_lc'].iat[name_idx].title()} {pbs['familyName_lc'].iat[name_idx].title()}"
             
             teammate_out_cols.append(out_col)
             teammate_names.append(teammate_name)
@@ -1108,7 +970,13 @@ def plot_player_pct_team_points(player_id, pbs, tbs, daily_ranks, teammate_ids=N
     
     x = np.arange(len(plot_df))
     
-    fig, ax = plt.subplots(figsize=(15, 6))
+    if ax is None:
+        fig = Figure(figsize=(15, 6))
+        ax = fig.subplots()
+        owns_fig = True
+    else:
+        fig = ax.figure
+        owns_fig = False
     
     # -----------------------------
     # Bars: Player % of team points
@@ -1119,7 +987,7 @@ def plot_player_pct_team_points(player_id, pbs, tbs, daily_ranks, teammate_ids=N
         width=0.7,
         color="tab:blue",
         alpha=0.5,
-        label=f"{player_df['firstName'].iloc[0]} {player_df['familyName'].iloc[0]} % of Team Points"
+        label=f"{plot_df['firstName'].iloc[0]} {plot_df['familyName'].iloc[0]} % of Team Points"
     )
     
     # -----------------------------
@@ -1162,22 +1030,26 @@ def plot_player_pct_team_points(player_id, pbs, tbs, daily_ranks, teammate_ids=N
     # -----------------------------
     y_min = plot_df["player_pct_team_pts"].min()
     
-    for i, row in plot_df.iterrows():
-        if pd.notna(row.get("def_rank")):
-            ax.text(
-                i,
-                y_min - 3,
-                f'{row["OPP_TEAM"]}\n#{int(row["def_rank"])}',
-                ha="center",
-                va="top",
-                fontsize=8,
-                alpha=0.85
-            )
+    has_rank = plot_df["def_rank"].notna().to_numpy()
+    for i, opp_team, rank in zip(
+        plot_df.index[has_rank],
+        plot_df["OPP_TEAM"].to_numpy()[has_rank],
+        plot_df["def_rank"].to_numpy()[has_rank]
+    ):
+        ax.text(
+            i,
+            y_min - 3,
+            f'{opp_team}\n#{int(rank)}',
+            ha="center",
+            va="top",
+            fontsize=8,
+            alpha=0.85
+        )
     
     # -----------------------------
     # Formatting
     # -----------------------------
-    player_name = f"{player_df['firstName'].iloc[0]} {player_df['familyName'].iloc[0]}"
+    player_name = f"{plot_df['firstName'].iloc[0]} {plot_df['familyName'].iloc[0]}"
     ax.set_title(f"{player_name} — % of Team Points by Game (Opponent Defensive Rank)")
     ax.set_ylabel("Percent of Team Points (%)")
     ax.set_xlabel("Game Number")
@@ -1192,7 +1064,7 @@ def plot_player_pct_team_points(player_id, pbs, tbs, daily_ranks, teammate_ids=N
         fontsize=10
     )
     
-    plt.tight_layout()
-    plt.show()
+    if owns_fig:
+        fig.tight_layout()
     
     return fig, ax
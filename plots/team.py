@@ -1,8 +1,8 @@
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 
-def plot_team_points_allowed(team_abbreviation, tbs, daily_ranks):
+def plot_team_points_allowed(team_abbreviation, tbs, daily_ranks, ax=None, league_avgs=None):
     """
     Plot a team's points allowed per game with season averages and opponent offensive ranks.
     
@@ -14,6 +14,11 @@ def plot_team_points_allowed(team_abbreviation, tbs, daily_ranks):
         Team box scores dataframe
     daily_ranks : pd.DataFrame
         Daily team rankings dataframe with offensive ranks
+    ax : matplotlib.axes.Axes, optional
+        Existing axis to draw into (e.g. a gridspec cell); a new figure is created if not given
+    league_avgs : pd.DataFrame, optional
+        Precomputed db_queries.build_league_averages(tbs); looked up by the team's
+        last game date instead of averaging the full tbs
     """
     
     # =========================================================
@@ -29,8 +34,10 @@ def plot_team_points_allowed(team_abbreviation, tbs, daily_ranks):
         .reset_index(drop=True)
     )
     
-    # Opponent abbreviation
-    team_games["OPP_TEAM"] = team_games["MATCHUP"].str[-3:]
+    # Opponent abbreviation (same dtype as the rank table's team key for merge_asof)
+    team_games["OPP_TEAM"] = team_games["MATCHUP"].str[-3:].astype(
+        daily_ranks["TEAM_ABBREVIATION"].dtype
+    )
     
     # =========================================================
     # 2) Season-to-date avg points allowed (NO leakage)
@@ -52,27 +59,26 @@ def plot_team_points_allowed(team_abbreviation, tbs, daily_ranks):
     )
     
     # League-wide avg points allowed
-    league_avg_pts_allowed = (
-        tbs[tbs["GAME_DATE"] <= team_games["GAME_DATE"].max()]
-        ["PTS_ALLOWED"]
-        .mean()
-    )
+    if league_avgs is not None:
+        league_avg_pts_allowed = league_avgs["PTS_ALLOWED"].get(team_games["GAME_DATE"].max(), np.nan)
+    else:
+        league_avg_pts_allowed = (
+            tbs[tbs["GAME_DATE"] <= team_games["GAME_DATE"].max()]
+            ["PTS_ALLOWED"]
+            .mean()
+        )
     
     # =========================================================
     # 3) Attach opponent OFFENSIVE rank (as of game date)
     # =========================================================
     
-    daily_ranks_plot = daily_ranks.copy()
-    daily_ranks_plot["game_date_dt"] = pd.to_datetime(daily_ranks_plot["game_date"])
-    
-    team_games = team_games.sort_values("GAME_DATE_DT")
-    daily_ranks_plot = daily_ranks_plot.sort_values("game_date_dt")
-    
+    # team_games is already in date order and build_ranks output is sorted by
+    # game_date, so daily_ranks goes in as-is (no copy / re-sort)
     team_games = pd.merge_asof(
         team_games,
-        daily_ranks_plot,
+        daily_ranks,
         left_on="GAME_DATE_DT",
-        right_on="game_date_dt",
+        right_on="game_date",
         left_by="OPP_TEAM",
         right_by="TEAM_ABBREVIATION",
         direction="backward"
@@ -84,7 +90,13 @@ def plot_team_points_allowed(team_abbreviation, tbs, daily_ranks):
     
     x = np.arange(len(team_games))
     
-    fig, ax = plt.subplots(figsize=(15, 6))
+    if ax is None:
+        fig = Figure(figsize=(15, 6))
+        ax = fig.subplots()
+        owns_fig = True
+    else:
+        fig = ax.figure
+        owns_fig = False
     
     # -----------------------------
     # Bars: points allowed
@@ -137,18 +149,23 @@ def plot_team_points_allowed(team_abbreviation, tbs, daily_ranks):
     # -----------------------------
     # Bottom labels: opponent + off rank
     # -----------------------------
-    for i, row in team_games.iterrows():
-        if pd.notna(row["off_rank"]):
-            ax.text(
-                i,
-                97,
-                f'{row["OPP_TEAM"]}\n#{int(row["off_rank"])}',
-                ha="center",
-                va="bottom",
-                fontsize=8,
-                color="black",
-                alpha=0.85
-            )
+    # Only games with a rank get a label; walk that subset as plain arrays
+    has_rank = team_games["off_rank"].notna().to_numpy()
+    for i, opp_team, rank in zip(
+        team_games.index[has_rank],
+        team_games["OPP_TEAM"].to_numpy()[has_rank],
+        team_games["off_rank"].to_numpy()[has_rank]
+    ):
+        ax.text(
+            i,
+            97,
+            f'{opp_team}\n#{int(rank)}',
+            ha="center",
+            va="bottom",
+            fontsize=8,
+            color="black",
+            alpha=0.85
+        )
     
     # -----------------------------
     # Formatting
@@ -170,11 +187,12 @@ def plot_team_points_allowed(team_abbreviation, tbs, daily_ranks):
         fontsize=10
     )
     
-    plt.tight_layout()
+    if owns_fig:
+        fig.tight_layout()
     
     return fig, ax
 
-def plot_team_points_scored(team_abbreviation, tbs, daily_ranks):
+def plot_team_points_scored(team_abbreviation, tbs, daily_ranks, ax=None, league_avgs=None):
     
     # =========================================================
     # 1) Prep team box scores
@@ -189,8 +207,10 @@ def plot_team_points_scored(team_abbreviation, tbs, daily_ranks):
         .reset_index(drop=True)
     )
     
-    # Opponent abbreviation
-    team_games["OPP_TEAM"] = team_games["MATCHUP"].str[-3:]
+    # Opponent abbreviation (same dtype as the rank table's team key for merge_asof)
+    team_games["OPP_TEAM"] = team_games["MATCHUP"].str[-3:].astype(
+        daily_ranks["TEAM_ABBREVIATION"].dtype
+    )
     
     # =========================================================
     # 2) Season-to-date avg points (NO leakage)
@@ -212,27 +232,26 @@ def plot_team_points_scored(team_abbreviation, tbs, daily_ranks):
     )
     
     # League-wide avg points 
-    league_avg_ppg = (
-        tbs[tbs["GAME_DATE"] <= team_games["GAME_DATE"].max()]
-        ["PTS"]
-        .mean()
-    )
+    if league_avgs is not None:
+        league_avg_ppg = league_avgs["PTS"].get(team_games["GAME_DATE"].max(), np.nan)
+    else:
+        league_avg_ppg = (
+            tbs[tbs["GAME_DATE"] <= team_games["GAME_DATE"].max()]
+            ["PTS"]
+            .mean()
+        )
     
     # =========================================================
     # 3) Attach opponent OFFENSIVE rank (as of game date)
     # =========================================================
     
-    daily_ranks_plot = daily_ranks.copy()
-    daily_ranks_plot["game_date_dt"] = pd.to_datetime(daily_ranks_plot["game_date"])
-    
-    team_games = team_games.sort_values("GAME_DATE_DT")
-    daily_ranks_plot = daily_ranks_plot.sort_values("game_date_dt")
-    
+    # team_games is already in date order and build_ranks output is sorted by
+    # game_date, so daily_ranks goes in as-is (no copy / re-sort)
     team_games = pd.merge_asof(
         team_games,
-        daily_ranks_plot,
+        daily_ranks,
         left_on="GAME_DATE_DT",
-        right_on="game_date_dt",
+        right_on="game_date",
         left_by="OPP_TEAM",
         right_by="TEAM_ABBREVIATION",
         direction="backward"
@@ -244,7 +263,13 @@ def plot_team_points_scored(team_abbreviation, tbs, daily_ranks):
     
     x = np.arange(len(team_games))
     
-    fig, ax = plt.subplots(figsize=(15, 6))
+    if ax is None:
+        fig = Figure(figsize=(15, 6))
+        ax = fig.subplots()
+        owns_fig = True
+    else:
+        fig = ax.figure
+        owns_fig = False
     
     # -----------------------------
     # Bars: points allowed
@@ -297,18 +322,23 @@ def plot_team_points_scored(team_abbreviation, tbs, daily_ranks):
     # -----------------------------
     # Bottom labels: opponent + off rank
     # -----------------------------
-    for i, row in team_games.iterrows():
-        if pd.notna(row["def_rank"]):
-            ax.text(
-                i,
-                97,
-                f'{row["OPP_TEAM"]}\n#{int(row["def_rank"])}',
-                ha="center",
-                va="bottom",
-                fontsize=8,
-                color="black",
-                alpha=0.85
-            )
+    # Only games with a rank get a label; walk that subset as plain arrays
+    has_rank = team_games["def_rank"].notna().to_numpy()
+    for i, opp_team, rank in zip(
+        team_games.index[has_rank],
+        team_games["OPP_TEAM"].to_numpy()[has_rank],
+        team_games["def_rank"].to_numpy()[has_rank]
+    ):
+        ax.text(
+            i,
+            97,
+            f'{opp_team}\n#{int(rank)}',
+            ha="center",
+            va="bottom",
+            fontsize=8,
+            color="black",
+            alpha=0.85
+        )
     
     # -----------------------------
     # Formatting
@@ -330,12 +360,18 @@ def plot_team_points_scored(team_abbreviation, tbs, daily_ranks):
         fontsize=10
     )
     
-    plt.tight_layout()
-    plt.show()
+    if owns_fig:
+        fig.tight_layout()
     
     return fig, ax
 
-def build_team_matchup_stats(off_team: str, def_team: str, home_team: str, away_team: str, tbs: pd.DataFrame, daily_ranks: pd.DataFrame) -> pd.DataFrame:
+def _masked_mean(values, mask):
+    """Mean of values[mask] ignoring NaN, NaN if nothing is left (same as Series.mean())."""
+    selected = values[mask]
+    selected = selected[~np.isnan(selected)]
+    return selected.mean() if len(selected) else np.nan
+
+def build_team_matchup_stats(off_team: str, def_team: str, home_team: str, away_team: str, tbs: pd.DataFrame, daily_ranks: pd.DataFrame, tbs_by_team: dict = None, latest_ranks: dict = None) -> pd.DataFrame:
     """
     Build a dataframe with team points scored and opponent points allowed across various conditions.
     
@@ -353,6 +389,12 @@ def build_team_matchup_stats(off_team: str, def_team: str, home_team: str, away_
         Team box scores dataframe with columns: GAME_ID, TEAM_ABBREVIATION, GAME_DATE, PTS, PTS_ALLOWED, OPP_TEAM, WL, MATCHUP
     daily_ranks : pd.DataFrame
         Daily team rankings dataframe with columns: game_date, TEAM_ABBREVIATION, def_rank, off_rank, avg_pts_allowed
+    tbs_by_team : dict, optional
+        Precomputed {TEAM_ABBREVIATION: team games sorted by GAME_DATE}; when given,
+        the two team slices are looked up instead of filtered from tbs
+    latest_ranks : dict, optional
+        Current {TEAM_ABBREVIATION: (off_rank, def_rank)} (e.g. the app's cached
+        get_latest_ranks); read from the last date of daily_ranks if not given
     
     Returns:
     --------
@@ -384,26 +426,39 @@ def build_team_matchup_stats(off_team: str, def_team: str, home_team: str, away_
             return "Bottom 10 Offense"
     
     # Get most recent defensive and offensive ranks for both teams
-    latest_ranks = daily_ranks.sort_values("game_date").groupby("TEAM_ABBREVIATION").tail(1)
-    off_def_rank = latest_ranks[latest_ranks["TEAM_ABBREVIATION"] == off_team]["def_rank"].iloc[0] if len(latest_ranks[latest_ranks["TEAM_ABBREVIATION"] == off_team]) > 0 else None
-    off_off_rank = latest_ranks[latest_ranks["TEAM_ABBREVIATION"] == off_team]["off_rank"].iloc[0] if len(latest_ranks[latest_ranks["TEAM_ABBREVIATION"] == off_team]) > 0 else None
-    def_def_rank = latest_ranks[latest_ranks["TEAM_ABBREVIATION"] == def_team]["def_rank"].iloc[0] if len(latest_ranks[latest_ranks["TEAM_ABBREVIATION"] == def_team]) > 0 else None
+    if latest_ranks is None:
+        # daily_ranks is sorted by game_date and every ranked team has a row on
+        # the last date, so that block is the latest snapshot (no sort / groupby)
+        dates = daily_ranks["game_date"].to_numpy()
+        last_day = daily_ranks.iloc[np.searchsorted(dates, dates[-1]):] if len(dates) else daily_ranks
+        latest_ranks = {
+            team: (off_rank, def_rank)
+            for team, off_rank, def_rank in zip(
+                last_day["TEAM_ABBREVIATION"].to_numpy(),
+                last_day["off_rank"].to_numpy(),
+                last_day["def_rank"].to_numpy()
+            )
+        }
+    off_off_rank, off_def_rank = latest_ranks.get(off_team, (None, None))
+    def_def_rank = latest_ranks.get(def_team, (None, None))[1]
     
     off_def_bucket = def_bucket(off_def_rank) if off_def_rank is not None else None
     off_off_bucket = off_bucket(off_off_rank) if off_off_rank is not None else None
     def_def_bucket = def_bucket(def_def_rank) if def_def_rank is not None else None
     
-    # Prepare data
-    tbs_copy = tbs.copy()
-    tbs_copy["GAME_DATE"] = pd.to_datetime(tbs_copy["GAME_DATE"])
+    # Get offensive / defensive team games
+    if tbs_by_team is not None:
+        off_games = tbs_by_team.get(off_team, tbs.iloc[:0]).copy()
+        def_games = tbs_by_team.get(def_team, tbs.iloc[:0]).copy()
+    else:
+        off_games = tbs[tbs["TEAM_ABBREVIATION"] == off_team].copy()
+        def_games = tbs[tbs["TEAM_ABBREVIATION"] == def_team].copy()
     
-    # Get offensive team games
-    off_games = tbs_copy[tbs_copy["TEAM_ABBREVIATION"] == off_team].copy()
-    off_games["HOME_AWAY"] = off_games["MATCHUP"].apply(lambda x: "HOME" if "vs" in x else "AWAY")
+    off_games["GAME_DATE"] = pd.to_datetime(off_games["GAME_DATE"])
+    off_games["HOME_AWAY"] = np.where(off_games["MATCHUP"].str.contains("vs", regex=False), "HOME", "AWAY")
     
-    # Get defensive team games
-    def_games = tbs_copy[tbs_copy["TEAM_ABBREVIATION"] == def_team].copy()
-    def_games["HOME_AWAY"] = def_games["MATCHUP"].apply(lambda x: "HOME" if "vs" in x else "AWAY")
+    def_games["GAME_DATE"] = pd.to_datetime(def_games["GAME_DATE"])
+    def_games["HOME_AWAY"] = np.where(def_games["MATCHUP"].str.contains("vs", regex=False), "HOME", "AWAY")
     
     # =========================================================
     # Build conditions dataframe
@@ -425,25 +480,16 @@ def build_team_matchup_stats(off_team: str, def_team: str, home_team: str, away_
     # def_team result: stats against off_team's offensive bucket
     
     if def_def_bucket is not None:
-        # Prepare daily ranks for merge_asof
-        daily_ranks_opp = daily_ranks.copy()
-        daily_ranks_opp["game_date_dt"] = pd.to_datetime(daily_ranks_opp["game_date"])
-        daily_ranks_opp = daily_ranks_opp.rename(columns={"TEAM_ABBREVIATION": "OPP_TEAM"})
-        daily_ranks_opp = daily_ranks_opp.sort_values(["game_date_dt", "OPP_TEAM"])
-        
-        # Prepare offensive team games for merge
-        off_games_merge = off_games.copy()
-        off_games_merge["GAME_DATE_DT"] = pd.to_datetime(off_games_merge["GAME_DATE"])
-        off_games_merge = off_games_merge.sort_values("GAME_DATE_DT")
-        
-        # Merge with opponent defensive ranks using merge_asof
+        # Team games are already in date order and build_ranks output is sorted
+        # by game_date, so daily_ranks goes in as-is (no copy / re-sort)
         off_games_with_opp_rank = pd.merge_asof(
-            off_games_merge,
-            daily_ranks_opp,
-            left_on="GAME_DATE_DT",
-            right_on="game_date_dt",
+            off_games,
+            daily_ranks,
+            left_on="GAME_DATE",
+            right_on="game_date",
             left_by="OPP_TEAM",
-            right_by="OPP_TEAM",
+            right_by="TEAM_ABBREVIATION",
+            suffixes=("", "_rank"),
             direction="backward"
         )
         off_games_with_opp_rank["opp_def_bucket"] = off_games_with_opp_rank["def_rank"].apply(def_bucket)
@@ -454,25 +500,15 @@ def build_team_matchup_stats(off_team: str, def_team: str, home_team: str, away_
         off_pts_vs_def_bucket = np.nan
     
     if off_off_bucket is not None:
-        # Prepare daily ranks for merge_asof
-        daily_ranks_opp = daily_ranks.copy()
-        daily_ranks_opp["game_date_dt"] = pd.to_datetime(daily_ranks_opp["game_date"])
-        daily_ranks_opp = daily_ranks_opp.rename(columns={"TEAM_ABBREVIATION": "OPP_TEAM"})
-        daily_ranks_opp = daily_ranks_opp.sort_values(["game_date_dt", "OPP_TEAM"])
-        
-        # Prepare defensive team games for merge
-        def_games_merge = def_games.copy()
-        def_games_merge["GAME_DATE_DT"] = pd.to_datetime(def_games_merge["GAME_DATE"])
-        def_games_merge = def_games_merge.sort_values("GAME_DATE_DT")
-        
-        # Merge with opponent offensive ranks using merge_asof
+        # Merge with opponent offensive ranks (same as above, daily_ranks as-is)
         def_games_with_opp_rank = pd.merge_asof(
-            def_games_merge,
-            daily_ranks_opp,
-            left_on="GAME_DATE_DT",
-            right_on="game_date_dt",
+            def_games,
+            daily_ranks,
+            left_on="GAME_DATE",
+            right_on="game_date",
             left_by="OPP_TEAM",
-            right_by="OPP_TEAM",
+            right_by="TEAM_ABBREVIATION",
+            suffixes=("", "_rank"),
             direction="backward"
         )
         def_games_with_opp_rank["opp_off_bucket"] = def_games_with_opp_rank["off_rank"].apply(off_bucket)
@@ -517,9 +553,15 @@ def build_team_matchup_stats(off_team: str, def_team: str, home_team: str, away_
             "def_team_pts_allowed": def_pts_allowed_at_home
         })
     
+    # Win/loss splits on plain arrays (no filtered frames per split)
+    off_wl = off_games["WL"].to_numpy()
+    def_wl = def_games["WL"].to_numpy()
+    off_pts = off_games["PTS"].to_numpy(dtype=float)
+    def_pts_allowed = def_games["PTS_ALLOWED"].to_numpy(dtype=float)
+    
     # 5) Offensive team in wins vs defensive team in losses
-    off_pts_in_wins = off_games[off_games["WL"] == "W"]["PTS"].mean()
-    def_pts_allowed_in_losses = def_games[def_games["WL"] == "L"]["PTS_ALLOWED"].mean()
+    off_pts_in_wins = _masked_mean(off_pts, off_wl == "W")
+    def_pts_allowed_in_losses = _masked_mean(def_pts_allowed, def_wl == "L")
     conditions.append({
         "condition": f"{off_team} in Wins / {def_team} in Losses",
         "off_team_pts_scored": off_pts_in_wins,
@@ -527,8 +569,8 @@ def build_team_matchup_stats(off_team: str, def_team: str, home_team: str, away_
     })
     
     # 6) Offensive team in losses vs defensive team in wins
-    off_pts_in_losses = off_games[off_games["WL"] == "L"]["PTS"].mean()
-    def_pts_allowed_in_wins = def_games[def_games["WL"] == "W"]["PTS_ALLOWED"].mean()
+    off_pts_in_losses = _masked_mean(off_pts, off_wl == "L")
+    def_pts_allowed_in_wins = _masked_mean(def_pts_allowed, def_wl == "W")
     conditions.append({
         "condition": f"{off_team} in Losses / {def_team} in Wins",
         "off_team_pts_scored": off_pts_in_losses,
@@ -540,7 +582,7 @@ def build_team_matchup_stats(off_team: str, def_team: str, home_team: str, away_
     
     return result_df
 
-def plot_team_matchup_comparison(matchup_df, off_team, def_team, home_team, away_team):
+def plot_team_matchup_comparison(matchup_df, off_team, def_team, home_team, away_team, ax=None):
     """
     Create a horizontal bar graph with pairs of adjacent bars representing team points scored 
     and opponent points allowed across various conditions.
@@ -558,6 +600,8 @@ def plot_team_matchup_comparison(matchup_df, off_team, def_team, home_team, away
         Home team abbreviation (e.g., "NOP")
     away_team : str
         Away team abbreviation (e.g., "LAL")
+    ax : matplotlib.axes.Axes, optional
+        Existing axis to draw into (e.g. a gridspec cell); a new figure is created if not given
     
     Returns:
     --------
@@ -565,7 +609,13 @@ def plot_team_matchup_comparison(matchup_df, off_team, def_team, home_team, away
         The matplotlib Figure object
     """
     # Create figure and axis
-    fig, ax = plt.subplots(figsize=(12, 8))
+    if ax is None:
+        fig = Figure(figsize=(12, 8))
+        ax = fig.subplots()
+        owns_fig = True
+    else:
+        fig = ax.figure
+        owns_fig = False
     
     # Number of conditions
     n_conditions = len(matchup_df)
@@ -705,9 +755,10 @@ def plot_team_matchup_comparison(matchup_df, off_team, def_team, home_team, away
     # Invert y-axis so top condition is at top
     ax.invert_yaxis()
     
-    plt.tight_layout()
-    # Adjust left margin to leave space for labels, and adjust top/bottom margins for better label alignment
-    # Reduce top margin to minimize gap between labels and bars
-    fig.subplots_adjust(left=0.40, top=0.98, bottom=0.08)
+    if owns_fig:
+        fig.tight_layout()
+        # Adjust left margin to leave space for labels, and adjust top/bottom margins for better label alignment
+        # Reduce top margin to minimize gap between labels and bars
+        fig.subplots_adjust(left=0.40, top=0.98, bottom=0.08)
     
     return fig, matchup_df
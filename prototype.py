@@ -1,18 +1,30 @@
+import io
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 import pandas as pd
-import matplotlib.pyplot as plt
 import numpy as np
 
-from plots.player import plot_player_scoring  # , plot_player_scoring_by_def_bucket
-from tables import player_hit_rate_summary
+# Plotting / table modules (Matplotlib, Altair) are imported where they're used,
+# so the selection screens never pay for them
+from slices import build_played_lookup, player_game_slice
+from team_names import TEAM_NAMES
 
 # New database query imports
 from db_queries import (
     get_all_teams,
     get_players_by_team,
+    search_players,
     load_process_pbs_from_db,
     load_process_tbs_from_db,
-    build_ranks
+    get_team_records,
+    build_ranks,
+    build_latest_ranks,
+    build_tbs_by_team
 )
 
 import os
@@ -22,7 +34,7 @@ from sqlalchemy.engine import URL
 @st.cache_resource
 def get_engine():
     url = URL.create(
-        drivername="postgresql+psycopg2",
+        drivername="postgresql+psycopg",
         username=st.secrets["DB_USER"],
         password=st.secrets["DB_PASSWORD"],
         host=st.secrets["DB_HOST"],
@@ -30,64 +42,659 @@ def get_engine():
         database=st.secrets["DB_NAME"],
     )
 
+    # One engine is shared by every session, so size the pool for concurrent
+    # reruns. Dead connections are handled by TCP keepalives and a short
+    # recycle rather than pool_pre_ping's extra round-trip on every checkout.
     return create_engine(
         url,
-        pool_pre_ping=True,
-        connect_args={"sslmode": "require"},
+        pool_size=20,
+        max_overflow=10,
+        pool_pre_ping=False,
+        pool_recycle=300,
+        connect_args={
+            "sslmode": "require",
+            "keepalives": 1,
+            "keepalives_idle": 30,
+            "keepalives_interval": 10,
+        },
     )
 
 engine = get_engine()
 
+# Player box score columns the dashboard render path actually reads
+PBS_RENDER_COLUMNS = (
+    "game_id", "game_date", "personId", "teamTricode", "firstName", "familyName",
+    "minutes", "points", "szn_avg_ppg", "r10_avg_ppg"
+)
+
+# Defensive rank -> bucket label (index 0 unused; ranks run 1-30, anything
+# past 30 from extra teams in the game log is clamped to the last entry)
+DEF_BUCKET_BY_RANK = (
+    (None,)
+    + ("Top 10 Defense",) * 10
+    + ("Middle 10 Defense",) * 10
+    + ("Bottom 10 Defense",) * 10
+)
+
+def get_data_version(tbs):
+    """Cheap cache key that changes whenever new games land in the team box scores."""
+    return (len(tbs), tbs["GAME_DATE"].max())
+
+def get_pbs_version(pbs):
+    """Same idea for the player box scores, which can be ingested after the team game log."""
+    return (len(pbs), pbs["game_date"].max())
+
+# persist="disk" ignores ttl; data_version already changes whenever new games land
+@st.cache_data(persist="disk", show_spinner=False)
+def get_daily_ranks(data_version, _tbs):
+    """Daily defensive/offensive ranks (categorical team key), built once per data version (survives restarts)."""
+    return build_ranks(_tbs)
+
+@st.cache_data(ttl=600, show_spinner=False)
+def get_latest_ranks(data_version, _tbs):
+    """Current {team: (off_rank, def_rank)} lookup, built once per data version."""
+    latest_ranks = build_latest_ranks(_tbs)
+    return {
+        team: (int(off_rank), int(def_rank))
+        for team, off_rank, def_rank in zip(
+            latest_ranks["TEAM_ABBREVIATION"].to_numpy(),
+            latest_ranks["off_rank"].to_numpy(),
+            latest_ranks["def_rank"].to_numpy()
+        )
+    }
+
+@st.cache_data(ttl=600, show_spinner=False)
+def get_tbs_by_team(data_version, _tbs):
+    """Per-team game logs sorted by date, split once per data version."""
+    return build_tbs_by_team(_tbs)
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def get_player_select_options(team_abbrev):
+    """
+    Player dropdown data for a team, built once per team.
+    
+    Returns ([None] + personIds, {personId: "Name (avg PPG)"}, {personId: "Name"});
+    the dropdown's options are the ids and its labels/header name are dict lookups.
+    """
+    players_df = get_players_by_team(engine, team_abbrev)
+    
+    player_ids = players_df["person_id"].astype(int).tolist()
+    names = players_df["display_name"].tolist()
+    labels = {
+        pid: f"{name} ({ppg:.1f} PPG)"
+        for pid, name, ppg in zip(player_ids, names, players_df["avg_ppg"].to_numpy())
+    }
+    return [None] + player_ids, labels, dict(zip(player_ids, names))
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def get_team_options():
+    """
+    Team abbreviations for the team/opponent dropdowns.
+    
+    Limited to abbreviations in TEAM_NAMES so every selectable team can be
+    resolved with a plain TEAM_NAMES[abbrev] lookup downstream.
+    """
+    return [
+        abbrev for abbrev in get_all_teams(engine)["team_abbreviation"].tolist()
+        if abbrev in TEAM_NAMES
+    ]
+
+@st.cache_data(ttl=600, show_spinner=False)
+def get_player_slice(player_id, data_version, pbs_version, _pbs, _tbs):
+    """Player games + team context, built once per (player, data versions) across reruns."""
+    return player_game_slice(player_id, _pbs, _tbs)
+
+@st.cache_data(ttl=600, show_spinner=False)
+def get_played_lookup(player_id, pbs_version, _pbs):
+    """game_id x personId played matrix for the teammate flags, built once per (player, pbs version)."""
+    return build_played_lookup(_pbs)
+
+@dataclass(frozen=True, slots=True)
+class Matchup:
+    """Home/away resolution of the selected player team vs the opponent."""
+    home: str
+    away: str
+    home_name: str
+    away_name: str
+    player_is_home: bool
+
+def build_matchup(player_team, opponent, player_team_home_away):
+    """
+    Resolve which side is home from the Home/Away buttons.
+    
+    player_team_home_away is "home", "away" or None (no pick yet); the player
+    team defaults to home. The buttons always set both teams' sides together,
+    so the player team's side alone decides the matchup.
+    """
+    player_is_home = player_team_home_away != "away"
+    home, away = (player_team, opponent) if player_is_home else (opponent, player_team)
+    return Matchup(
+        home=home,
+        away=away,
+        home_name=TEAM_NAMES[home],
+        away_name=TEAM_NAMES[away],
+        player_is_home=player_is_home
+    )
+
+# Matplotlib renders run off the script thread so they overlap the table work;
+# each helper draws on its own Figure (no shared pyplot state) and Agg releases
+# the GIL while rasterizing
+RENDER_POOL = ThreadPoolExecutor(max_workers=4)
+
+def submit_render(fn, *args, **kwargs):
+    """Run a cached render/load on RENDER_POOL with this session's script context attached."""
+    ctx = get_script_run_ctx()
+
+    def run():
+        add_script_run_ctx(threading.current_thread(), ctx)
+        return fn(*args, **kwargs)
+
+    return RENDER_POOL.submit(run)
+
+def load_render_data(player_id):
+    """
+    Player box scores + full team game log for the dashboard.
+    
+    Each loader is cached on its own: tbs is shared by every player (one entry
+    per ttl window), pbs is per player. When both miss, the two COPYs run
+    concurrently on separate pooled connections instead of back to back.
+    """
+    tbs_future = submit_render(load_process_tbs_from_db, engine)
+    pbs = load_process_pbs_from_db(engine, person_id=player_id, columns=PBS_RENDER_COLUMNS)
+    return pbs, tbs_future.result()
+
+# Plot modules bound once on first use (still lazy, so the selection screens
+# never import Matplotlib); reruns then skip the import machinery entirely
+@lru_cache(maxsize=None)
+def _plots_player():
+    import plots.player
+    return plots.player
+
+@lru_cache(maxsize=None)
+def _plots_team():
+    import plots.team
+    return plots.team
+
+# Screen resolution is plenty for the dashboard plots; the 32x15in figures at
+# the default 100 DPI made multi-megapixel PNGs for every render
+PLOT_DPI = 72
+
+def fig_to_png(fig):
+    """Rasterize a matplotlib figure to PNG bytes and clear it."""
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", dpi=PLOT_DPI, bbox_inches="tight")
+    # Plot figures are plain Figures (never registered with pyplot), so there is
+    # nothing to close; clearing drops their Artists now instead of whenever the
+    # garbage collector gets to the figure's reference cycles
+    fig.clf()
+    return buf.getvalue()
+
+@st.cache_data(ttl=600, show_spinner=False)
+def get_player_scoring_df(player_id, data_version, pbs_version, _pbs, _tbs, _daily_ranks, _player_slice=None):
+    """Per-game rows for the player scoring chart; independent of the prop line."""
+    return _plots_player().build_player_scoring_df(
+        player_id,
+        _pbs,
+        _tbs,
+        _daily_ranks,
+        player_slice=_player_slice
+    )
+
+@st.cache_data(ttl=600, show_spinner=False)
+def get_hit_rate_summary(player_id, prop_line, home_away, opp_def_bucket, data_version, pbs_version, _pbs, _tbs, _daily_ranks, _player_slice=None, _played_lookup=None):
+    """Hit rate table keyed by scalars only, so revisiting a prop line / matchup is a cache hit."""
+    from tables import hit_rate_table
+
+    labels, masks, points = get_hit_rate_masks(
+        player_id, home_away, opp_def_bucket, data_version, pbs_version,
+        _pbs, _tbs, _daily_ranks, _player_slice, _played_lookup
+    )
+    return hit_rate_table(labels, masks, points, prop_line)
+
+@st.cache_data(ttl=600, show_spinner=False)
+def get_hit_rate_masks(player_id, home_away, opp_def_bucket, data_version, pbs_version, _pbs, _tbs, _daily_ranks, _player_slice=None, _played_lookup=None):
+    """Hit rate category masks; prop-line independent, so a new line only redoes the counts."""
+    from tables import hit_rate_masks
+
+    return hit_rate_masks(
+        player_id,
+        _pbs,
+        _tbs,
+        _daily_ranks,
+        teammates=None,  # Can add teammate selection later
+        matchup_home_away=home_away,
+        matchup_opp_def_bucket=opp_def_bucket,
+        player_slice=_player_slice,
+        played_lookup=_played_lookup
+    )
+
+@st.cache_data(ttl=600, show_spinner=False)
+def render_matchup_png(off_team, def_team, home_team, away_team, plot_height_inches, data_version, _tbs, _daily_ranks):
+    """
+    Render the team matchup comparison plot; returns (png_bytes, matchup_df).
+    
+    Runs on RENDER_POOL, so every call draws on its own Figure: Figures are not
+    thread-safe, and an interrupted rerun's job may still be drawing.
+    """
+    plots_team = _plots_team()
+
+    matchup_df = plots_team.build_team_matchup_stats(
+        off_team=off_team,
+        def_team=def_team,
+        home_team=home_team,
+        away_team=away_team,
+        tbs=_tbs,
+        daily_ranks=_daily_ranks,
+        tbs_by_team=get_tbs_by_team(data_version, _tbs),
+        latest_ranks=get_latest_ranks(data_version, _tbs)
+    )
+
+    matchup_fig, matchup_df = plots_team.plot_team_matchup_comparison(
+        matchup_df=matchup_df,
+        off_team=off_team,
+        def_team=def_team,
+        home_team=home_team,
+        away_team=away_team
+    )
+
+    matchup_fig.set_size_inches(25, plot_height_inches)
+    matchup_fig.tight_layout()
+    return fig_to_png(matchup_fig), matchup_df
+
+# Label column HTML pieces; build_label_html fills in heights / text
+LABEL_DIV = '<div style="font-size: 15px; font-weight: bold; padding: 0; line-height: 1.2; text-align: right; height: {height}px; display: flex; align-items: {align}; justify-content: flex-end; margin: 0;">{text}</div>'
+SEASON_LABEL_DIV = '<div style="font-size: 15px; font-weight: bold; padding: 2px 0; line-height: 1.2; text-align: right; height: {height}px; display: flex; align-items: center; justify-content: flex-end; margin: 0;">{text}</div>'
+EMPTY_DIV = '<div style="height: {height}px; margin: 0;"></div>'
+CATEGORY_GAP_DIV = '<div style="height: 10px;"></div>'
+GROUP_GAP_DIV = '<div style="height: 55px;"></div>'
+# Adjust padding-top to align labels with bars - centered with plot's y-axis
+LABEL_COLUMN_DIV = '<div style="display: flex; flex-direction: column; justify-content: flex-start; height: {height}px; padding-right: 15px; padding-top: 135px;">{labels}</div>'
+
+@st.cache_data(ttl=600, show_spinner=False)
+def build_label_html(conditions, off_pts, def_pts, bar_width):
+    """
+    HTML label column for the matchup plot, one div per bar.
+    
+    Labels are split into two lines (except Season Averages), each aligned
+    with one bar; bucket-average pairs share a slot and categories get spacing.
+    Takes the matchup table's columns as tuples so the result caches by value.
+    """
+    n = len(conditions)
+    has_off = ~pd.isna(np.asarray(off_pts, dtype=float))
+    has_def = ~pd.isna(np.asarray(def_pts, dtype=float))
+    
+    # Classify every row up front; the loop below only dispatches on the flags
+    cond = np.asarray(conditions, dtype=str)
+    is_season = cond == "Season Averages"
+    has_slash = np.char.find(cond, " / ") >= 0
+    has_comma = np.char.find(cond, ", ") >= 0
+    bucket_single = (np.char.find(cond, " vs ") >= 0) & ~has_slash & ~is_season
+    bucket_first = bucket_single & (has_off != has_def)
+    bucket_pair = np.zeros(n, dtype=bool)
+    bucket_pair[:-1] = bucket_first[:-1] & bucket_first[1:]
+    
+    row_height = bar_width * 60
+    
+    parts = []
+    prev_was_bucket_pair = False
+    
+    i = 0
+    while i < n:
+        condition = conditions[i]
+        
+        is_bucket_pair = bucket_pair[i]
+        
+        # Add spacing between condition categories (but not between bucket pair rows)
+        if i > 0 and not prev_was_bucket_pair and not is_bucket_pair:
+            parts.append(CATEGORY_GAP_DIV)  # Spacing between categories
+        
+        if is_season[i]:
+            # Single line centered for Season Averages
+            parts.append(SEASON_LABEL_DIV.format(height=bar_width * 2 * 60, text=condition))
+            # Add spacing after Season Averages
+            parts.append(GROUP_GAP_DIV)
+            prev_was_bucket_pair = False
+            i += 1
+        elif is_bucket_pair:
+            # Bucket average pair - both labels share the same visual space
+            # Top label (orange bar)
+            parts.append(LABEL_DIV.format(height=row_height, align="flex-end", text=condition))
+            # Bottom label (blue bar) - tight against top
+            parts.append(LABEL_DIV.format(height=row_height, align="flex-start", text=conditions[i + 1]))
+            # Add spacing after bucket pair
+            parts.append(GROUP_GAP_DIV)
+            prev_was_bucket_pair = True
+            i += 2  # Skip both rows
+        elif bucket_single[i]:
+            # Standalone bucket average (shouldn't happen, but handle it)
+            if has_off[i]:
+                parts.append(LABEL_DIV.format(height=row_height, align="flex-end", text=condition))
+                parts.append(EMPTY_DIV.format(height=row_height))
+            else:
+                parts.append(EMPTY_DIV.format(height=row_height))
+                parts.append(LABEL_DIV.format(height=row_height, align="flex-start", text=condition))
+            # Add spacing after standalone bucket
+            parts.append(GROUP_GAP_DIV)
+            prev_was_bucket_pair = False
+            i += 1
+        else:
+            # Regular condition with " / " (or ", ") - split into two lines
+            if has_slash[i]:
+                line1, line2 = (part.strip() for part in condition.split(" / ", 1))
+            elif has_comma[i]:
+                line1, line2 = (part.strip() for part in condition.split(", ", 1))
+            else:
+                line1, line2 = condition, ""
+            
+            # Create two divs aligned with each bar - tight together
+            # Top bar (orange) - aligned with orange bar
+            if line1:
+                parts.append(LABEL_DIV.format(height=row_height, align="flex-end", text=line1))
+            else:
+                parts.append(EMPTY_DIV.format(height=row_height))
+            # Bottom bar (blue) - aligned with blue bar, tight against top
+            if line2:
+                parts.append(LABEL_DIV.format(height=row_height, align="flex-start", text=line2))
+            else:
+                parts.append(EMPTY_DIV.format(height=row_height))
+            # Add spacing after regular condition pair
+            parts.append(GROUP_GAP_DIV)
+            prev_was_bucket_pair = False
+            i += 1
+    
+    return "".join(parts)
+
+@st.cache_data(ttl=600, show_spinner=False)
+def build_matchup_labels(conditions, off_pts, def_pts, bar_width, plot_height_inches):
+    """
+    Full label column HTML for the matchup plot, container div included.
+    
+    Cached on the same tuple keys as build_label_html plus the plot height, so
+    reruns that don't change the matchup bars skip the string building entirely.
+    """
+    # Container height matches the plot (approximate inches -> px conversion)
+    label_container_height = plot_height_inches * 80
+    return LABEL_COLUMN_DIV.format(
+        height=label_container_height,
+        labels=build_label_html(conditions, off_pts, def_pts, bar_width)
+    )
+
 st.set_page_config(
     page_title="NBA Player Prop Dashboard",
     layout="wide"
 )
 
-# Custom CSS to maximize screen usage and reduce spacing
-st.markdown("""
-    <style>
-    .main .block-container {
-        padding-top: 0.25rem;
-        padding-bottom: 0.25rem;
-        padding-left: 0.5rem;
-        padding-right: 0.5rem;
-        max-width: 100%;
-    }
-    h2, h3 {
-        margin-top: 0.1rem;
-        margin-bottom: 0.1rem;
-    }
-    .stDataFrame {
-        margin-bottom: 0;
-        height: 100%;
-    }
-    .element-container {
-        margin-bottom: 0.1rem;
-    }
-    [data-testid="stVerticalBlock"] {
-        gap: 0.1rem;
-    }
-    section[data-testid="stSidebar"] {
-        display: none;
-    }
-    </style>
-    """, unsafe_allow_html=True)
-
-# Team name mapping
-TEAM_NAMES = {
-    "ATL": "Atlanta Hawks", "BOS": "Boston Celtics", "BKN": "Brooklyn Nets", "CHA": "Charlotte Hornets",
-    "CHI": "Chicago Bulls", "CLE": "Cleveland Cavaliers", "DAL": "Dallas Mavericks", "DEN": "Denver Nuggets",
-    "DET": "Detroit Pistons", "GSW": "Golden State Warriors", "HOU": "Houston Rockets", "IND": "Indiana Pacers",
-    "LAC": "LA Clippers", "LAL": "Los Angeles Lakers", "MEM": "Memphis Grizzlies", "MIA": "Miami Heat",
-    "MIL": "Milwaukee Bucks", "MIN": "Minnesota Timberwolves", "NOP": "New Orleans Pelicans", "NYK": "New York Knicks",
-    "OKC": "Oklahoma City Thunder", "ORL": "Orlando Magic", "PHI": "Philadelphia 76ers", "PHX": "Phoenix Suns",
-    "POR": "Portland Trail Blazers", "SAC": "Sacramento Kings", "SAS": "San Antonio Spurs", "TOR": "Toronto Raptors",
-    "UTA": "Utah Jazz", "WAS": "Washington Wizards"
-}
-
-def get_team_full_name(abbrev):
-    """Get full team name from abbreviation."""
-    return TEAM_NAMES.get(abbrev, abbrev)
+# Custom CSS to maximize screen usage and reduce spacing (static file, read once)
+@st.cache_resource
+def load_dashboard_css():
+    """Read dashboard.css (next to this file) once per process."""
+    css_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "dashboard.css")
+    with open(css_path) as f:
+        return f"<style>{f.read()}</style>"
+
+st.markdown(load_dashboard_css(), unsafe_allow_html=True)
+
+# =========================================================
+# DASHBOARD FRAGMENT
+# =========================================================
+
+@st.fragment
+def render_dashboard():
+    """
+    Prop line input + matchup header, player plot, hit rate table and matchup plot.
+    
+    Runs as a fragment so Render clicks rerun only this block instead of
+    the whole script (team/player/opponent selectboxes and their queries).
+    """
+    st.markdown("### Enter Prop Line")
+    # Typing in a form doesn't rerun anything; the value is applied on Render
+    with st.form("prop_form", border=False):
+        prop_text = st.text_input(
+            "Prop Line",
+            value=f"{29.5 if st.session_state.prop_line is None else st.session_state.prop_line}",
+            key="prop_line_input"
+        )
+        render_clicked = st.form_submit_button("Render", type="primary")
+    
+    if render_clicked:
+        try:
+            prop_line = float(prop_text)
+        except ValueError:
+            prop_line = None
+        if prop_line is None or not 0.0 <= prop_line <= 100.0:
+            st.error(f"Prop line must be a number between 0 and 100 (got \"{prop_text}\").")
+            render_clicked = False
+        else:
+            st.session_state.prop_line = prop_line
+    
+    # Snapshot the selection once; everything below reads these locals
+    selected_team = st.session_state.selected_team
+    selected_player_id = st.session_state.selected_player_id
+    selected_opponent = st.session_state.selected_opponent
+    selected_player_name = st.session_state.selected_player_name
+    player_team_home_away = st.session_state.player_team_home_away
+    prop_line = st.session_state.prop_line
+    
+    # Heavy work only runs for the selection the user last asked to render, so
+    # editing the prop line or switching teams doesn't recompute until Render
+    render_key = (
+        selected_team,
+        selected_player_id,
+        selected_opponent,
+        player_team_home_away,
+        prop_line
+    )
+    if render_clicked:
+        st.session_state.last_rendered = render_key
+    
+    selections_made = (
+        selected_team is not None and
+        selected_player_id is not None and
+        selected_opponent is not None
+    )
+    if selections_made and st.session_state.last_rendered != render_key:
+        st.info("Click Render to update the dashboard for the current selections.")
+    
+    # Render player scoring plot when all selections are made and requested
+    if selections_made and st.session_state.last_rendered == render_key:
+        
+        # Query data from database
+        pbs, tbs = load_render_data(selected_player_id)
+        data_version = get_data_version(tbs)
+        pbs_version = get_pbs_version(pbs)
+
+        # Get team records and ranks for matchup header
+        team_records = get_team_records(engine)
+        
+        # Current ranks (latest snapshot only, no full daily history needed)
+        latest_ranks = get_latest_ranks(data_version, tbs)
+        
+        # Get player team stats
+        player_wins, player_losses, player_l10_wins, player_l10_losses = team_records[selected_team]
+        player_off_rank, player_def_rank = latest_ranks.get(selected_team, (None, None))
+        
+        # Get opponent team stats
+        opp_wins, opp_losses, opp_l10_wins, opp_l10_losses = team_records[selected_opponent]
+        opp_off_rank, opp_def_rank = latest_ranks.get(selected_opponent, (None, None))
+        
+        # Resolve home/away once; everything below reads from this
+        # (dropdowns only offer teams in TEAM_NAMES, so names index directly)
+        matchup = build_matchup(
+            selected_team,
+            selected_opponent,
+            player_team_home_away
+        )
+        
+        # Render matchup header: away team on the left, home team on the right;
+        # player team shows its offensive rank, opponent its defensive rank
+        player_side = (
+            f"{player_wins}-{player_losses}",
+            f"{player_l10_wins}-{player_l10_losses}",
+            "Off Rank",
+            player_off_rank
+        )
+        opp_side = (
+            f"{opp_wins}-{opp_losses}",
+            f"{opp_l10_wins}-{opp_l10_losses}",
+            "Def Rank",
+            opp_def_rank
+        )
+        left_side, right_side = (opp_side, player_side) if matchup.player_is_home else (player_side, opp_side)
+        left_record_szn, left_record_l10, left_rank_label, left_rank_value = left_side
+        right_record_szn, right_record_l10, right_rank_label, right_rank_value = right_side
+        
+        st.markdown("---")
+        matchup_html = f"""
+        <div style='text-align: center; padding: 1rem; background-color: rgba(0,0,0,0.1); border-radius: 10px; margin: 1rem 0;'>
+            <h2 style='margin-bottom: 1rem;'>{matchup.away_name} @ {matchup.home_name}</h2>
+            <div style='display: flex; justify-content: center; gap: 1rem;'>
+                <div style='text-align: center; flex: 1;'>
+                    <div style='margin-bottom: 0.5rem; font-size: 16px; font-weight: bold;'>{left_record_szn} (L10: {left_record_l10})</div>
+                    <div style='font-size: 16px; font-weight: bold;'>{left_rank_label} #{left_rank_value if left_rank_value else 'N/A'}</div>
+                </div>
+                <div style='text-align: center; flex: 1;'>
+                    <div style='margin-bottom: 0.5rem; font-size: 16px; font-weight: bold;'>{right_record_szn} (L10: {right_record_l10})</div>
+                    <div style='font-size: 16px; font-weight: bold;'>{right_rank_label} #{right_rank_value if right_rank_value else 'N/A'}</div>
+                </div>
+            </div>
+        </div>
+        """
+        st.markdown(matchup_html, unsafe_allow_html=True)
+        
+        # Player name for header (carried over from the player dropdown)
+        player_display_name = selected_player_name
+        
+        # Render player scoring plot and hit rate table
+        st.markdown(f"<h2 style='text-align: center;'>{player_display_name} - Over {prop_line} Points</h2>", unsafe_allow_html=True)
+        
+        # Historical (as-of) ranks are only needed from here on
+        daily_ranks = get_daily_ranks(data_version, tbs)
+        
+        # Player games + team context, shared by the plot and the hit rate table
+        player_slice = get_player_slice(selected_player_id, data_version, pbs_version, pbs, tbs)
+        played_lookup = get_played_lookup(selected_player_id, pbs_version, pbs)
+        
+        # Player scoring chart data (full width) - cached per player/data version;
+        # the chart itself is drawn client-side so prop line changes skip Matplotlib
+        player_scoring_df = get_player_scoring_df(
+            selected_player_id,
+            data_version,
+            pbs_version,
+            pbs,
+            tbs,
+            daily_ranks,
+            player_slice
+        )
+        
+        # Player's home/away status for this matchup
+        player_home_away = "HOME" if matchup.player_is_home else "AWAY"
+        
+        # Opponent defensive bucket based on their current defensive rank
+        matchup_opp_def_bucket = (
+            None if opp_def_rank is None
+            else DEF_BUCKET_BY_RANK[min(opp_def_rank, len(DEF_BUCKET_BY_RANK) - 1)]
+        )
+        
+        summary_table = get_hit_rate_summary(
+            selected_player_id,
+            prop_line,
+            player_home_away,
+            matchup_opp_def_bucket,
+            data_version,
+            pbs_version,
+            pbs,
+            tbs,
+            daily_ranks,
+            _player_slice=player_slice,
+            _played_lookup=played_lookup
+        )
+        
+        # player_hit_rate_summary already drops rows with no games / hit rate;
+        # only empty category names are left to filter here
+        # (one mask over the raw array, applied positionally)
+        category = summary_table["Category"].to_numpy(dtype=object)
+        summary_table_filtered = summary_table.iloc[~pd.isna(category) & (category != "")]
+        
+        # Calculate table height with increased row height to fill available space
+        # Increase per-row height to make table fill more space - expanded to fill empty space
+        table_height = (len(summary_table_filtered) + 1) * 65 + 50  # Increased row height to fill more space
+        
+        # Calculate plot height to match hit rate table
+        # With expanded plot (70% width), we can make it taller to reduce empty space
+        matchup_table_height = (len(summary_table_filtered) + 1) * 42 + 3
+        # Convert pixels to inches - make plot significantly taller to reduce gap
+        plot_height_inches = max(14, matchup_table_height / 30)  # Much taller plot
+        
+        # Build matchup stats and plot - cached PNG per matchup/data version
+        matchup_future = submit_render(
+            render_matchup_png,
+            selected_team,
+            selected_opponent,
+            matchup.home,
+            matchup.away,
+            plot_height_inches,
+            data_version,
+            tbs,
+            daily_ranks
+        )
+        
+        st.altair_chart(
+            _plots_player().player_scoring_chart(player_scoring_df, prop_line),
+            use_container_width=True
+        )
+        
+        # Add spacing between player scoring plot and bottom section
+        st.markdown("<div style='height: 2rem;'></div>", unsafe_allow_html=True)
+        
+        # Render hit rate summary table and team matchup comparison side by side
+        # Condensed table (30%) and expanded plot (70%)
+        col_table, col_plot = st.columns([0.3, 0.7])
+        
+        with col_table:
+            st.markdown("<h3 style='text-align: center; margin-bottom: 1rem;'>Hit Rate Summary</h3>", unsafe_allow_html=True)
+            
+            # Plain DataFrame + column_config (no pandas Styler) keeps rendering on the fast path
+            st.dataframe(
+                summary_table_filtered,
+                use_container_width=True,
+                hide_index=True,
+                height=table_height,
+                column_config={
+                    "Games": st.column_config.NumberColumn(format="%d"),
+                    "Hit Rate (%)": st.column_config.ProgressColumn(
+                        min_value=0,
+                        max_value=100,
+                        format="%.1f%%"
+                    ),
+                }
+            )
+        
+        with col_plot:
+            matchup_png, matchup_df_returned = matchup_future.result()
+            
+            # Create custom layout with labels on left and plot on right
+            n_conditions = len(matchup_df_returned)
+            bar_width = 0.35
+            
+            # Condition label column (cached per matchup table contents / plot height)
+            label_html = build_matchup_labels(
+                tuple(matchup_df_returned["condition"].to_numpy()),
+                tuple(matchup_df_returned["off_team_pts_scored"].to_numpy()),
+                tuple(matchup_df_returned["def_team_pts_allowed"].to_numpy()),
+                bar_width,
+                plot_height_inches
+            )
+            
+            # Display labels and plot side by side
+            label_col, plot_col = st.columns([0.35, 0.65])
+            
+            with label_col:
+                st.markdown(label_html, unsafe_allow_html=True)
+            
+            with plot_col:
+                # Add title above plot only (centered over plot, not over plot + labels)
+                st.markdown(f"<h2 style='text-align: center; margin-bottom: 1rem; font-size: 24px;'>{matchup.away} @ {matchup.home}<br>Points Scored vs Points Allowed by Condition</h2>", unsafe_allow_html=True)
+                st.image(matchup_png, use_container_width=True)
 
 # =========================================================
 # MAIN APP
@@ -102,10 +709,14 @@ if "selected_team" not in st.session_state:
     st.session_state.selected_team = None
 if "selected_player_id" not in st.session_state:
     st.session_state.selected_player_id = None
+if "selected_player_name" not in st.session_state:
+    st.session_state.selected_player_name = None
 if "selected_opponent" not in st.session_state:
     st.session_state.selected_opponent = None
 if "prop_line" not in st.session_state:
     st.session_state.prop_line = None
+if "last_rendered" not in st.session_state:
+    st.session_state.last_rendered = None  # render_key of the last Render click
 if "prev_team" not in st.session_state:
     st.session_state.prev_team = None
 if "player_team_home_away" not in st.session_state:
@@ -113,51 +724,100 @@ if "player_team_home_away" not in st.session_state:
 if "opponent_team_home_away" not in st.session_state:
     st.session_state.opponent_team_home_away = None  # "home" or "away"
 
-# Track team changes to reset player selection
-if st.session_state.prev_team != st.session_state.selected_team:
-    if st.session_state.prev_team is not None:
-        st.session_state.selected_player_id = None
-    st.session_state.prev_team = st.session_state.selected_team
-
 # Get all teams for dropdowns - with error handling
 try:
-    teams_df = get_all_teams(engine)
-    team_options = teams_df["team_abbreviation"].tolist()
+    team_options = get_team_options()
 except Exception as e:
     st.error(f"Database connection error: {str(e)}")
     st.info("Please check your database connection and try again.")
     team_options = []  # Provide empty list as fallback
     st.stop()  # Stop execution if we can't get teams
 
+# Player search: jump straight to a player instead of walking team -> player
+def apply_player_pick(person_id, team_abbrev):
+    """Select a player (and their team) found via search, as if picked in the cascade."""
+    st.session_state.selected_team = team_abbrev
+    st.session_state.prev_team = team_abbrev  # team change here must not reset the player
+    st.session_state.selected_player_id = int(person_id)
+    # Drop the cascade widget state so their index= picks up the new selection
+    for key in ("team_selectbox", "player_selectbox"):
+        if key in st.session_state:
+            del st.session_state[key]
+
+def on_player_search():
+    """Auto-select when the search text matches exactly one player."""
+    query = st.session_state.player_search_input.strip()
+    if len(query) < 2:
+        return
+    matches = search_players(engine, query)
+    if len(matches) == 1:
+        apply_player_pick(matches["person_id"].iat[0], matches["team_tricode"].iat[0])
+
+def on_player_search_pick():
+    """Apply a pick from the search results dropdown."""
+    pick = st.session_state.player_search_select
+    if pick is not None:
+        apply_player_pick(pick[0], pick[1])
+
+def set_player_team_home_away(player_side):
+    """Home/Away button callback; runs before the rerun so button styling is current."""
+    st.session_state.player_team_home_away = player_side
+    st.session_state.opponent_team_home_away = "away" if player_side == "home" else "home"
+
+search_query = st.text_input(
+    "Search player",
+    key="player_search_input",
+    placeholder="Type part of a player's name...",
+    on_change=on_player_search
+).strip()
+
+if len(search_query) >= 2:
+    search_results = search_players(engine, search_query)
+    if len(search_results) > 1:
+        search_options = [
+            (int(pid), team, f"{name} ({team})")
+            for pid, name, team in zip(
+                search_results["person_id"].to_numpy(),
+                search_results["display_name"].to_numpy(),
+                search_results["team_tricode"].to_numpy()
+            )
+        ]
+        st.selectbox(
+            "Matching players",
+            options=[None] + search_options,
+            format_func=lambda x: f"{len(search_options)} matches..." if x is None else (x[2] if isinstance(x, tuple) else x),
+            key="player_search_select",
+            on_change=on_player_search_pick
+        )
+    elif len(search_results) == 0:
+        st.caption(f"No players matching \"{search_query}\"")
+
+# Read selections once per rerun; session_state is only written back on change
+selected_team = st.session_state.selected_team
+
 # Dropdown 1: Player Team Selection (always visible)
 col_team_title, col_team_buttons = st.columns([3, 1])
 with col_team_title:
     st.markdown("### Select Player Team")
 with col_team_buttons:
     # Home/Away buttons for player team
-    if st.session_state.selected_team is not None:
+    if selected_team is not None:
         col_home, col_away = st.columns(2)
         with col_home:
-            home_selected = st.button("Home", key="player_team_home_btn", 
-                                    type="primary" if st.session_state.player_team_home_away == "home" else "secondary",
-                                    use_container_width=True)
-            if home_selected:
-                st.session_state.player_team_home_away = "home"
-                st.session_state.opponent_team_home_away = "away"
-                st.rerun()
+            st.button("Home", key="player_team_home_btn", 
+                      type="primary" if st.session_state.player_team_home_away == "home" else "secondary",
+                      use_container_width=True,
+                      on_click=set_player_team_home_away, args=("home",))
         with col_away:
-            away_selected = st.button("Away", key="player_team_away_btn",
-                                    type="primary" if st.session_state.player_team_home_away == "away" else "secondary",
-                                    use_container_width=True)
-            if away_selected:
-                st.session_state.player_team_home_away = "away"
-                st.session_state.opponent_team_home_away = "home"
-                st.rerun()
+            st.button("Away", key="player_team_away_btn",
+                      type="primary" if st.session_state.player_team_home_away == "away" else "secondary",
+                      use_container_width=True,
+                      on_click=set_player_team_home_away, args=("away",))
 
 # Calculate index for current selection
 team_index = 0
-if st.session_state.selected_team is not None and st.session_state.selected_team in team_options:
-    team_index = team_options.index(st.session_state.selected_team) + 1
+if selected_team is not None and selected_team in team_options:
+    team_index = team_options.index(selected_team) + 1
 
 selected_team = st.selectbox(
     "Player Team",
@@ -168,469 +828,78 @@ selected_team = st.selectbox(
 
 st.session_state.selected_team = selected_team
 
-# Update prev_team tracking
-if st.session_state.prev_team != st.session_state.selected_team:
+# Reset player selection when the team changes
+if st.session_state.prev_team != selected_team:
     st.session_state.selected_player_id = None
-st.session_state.prev_team = st.session_state.selected_team
+    st.session_state.prev_team = selected_team
+
+selected_player_id = st.session_state.selected_player_id
+selected_opponent = st.session_state.selected_opponent
 
 # Dropdown 2: Player Selection (only visible after team is selected)
-if st.session_state.selected_team is not None:
-    # Get players for selected team
-    players_df = get_players_by_team(engine, st.session_state.selected_team)
+if selected_team is not None:
+    # Get players for selected team (options built once per team)
+    player_ids, player_labels, player_names = get_player_select_options(selected_team)
     
-    if len(players_df) > 0:
-        # Create display options: "FirstName LastName (avg_ppg PPG)"
-        player_options = [
-            (row["person_id"], f"{row['display_name']} ({row['avg_ppg']:.1f} PPG)")
-            for _, row in players_df.iterrows()
-        ]
-        
+    if len(player_labels) > 0:
         st.markdown("### Select Player")
         
-        # Find current selection index
         # Reset to None if the selected player doesn't exist in the new team
-        player_found = False
-        current_idx = 0
-        if st.session_state.selected_player_id is not None:
-            for idx, (pid, _) in enumerate(player_options):
-                if pid == st.session_state.selected_player_id:
-                    current_idx = idx
-                    player_found = True
-                    break
-            # If player not found in new team, reset selection
-            if not player_found:
-                st.session_state.selected_player_id = None
+        if selected_player_id not in player_labels:
+            selected_player_id = None
         
-        selected_player_option = st.selectbox(
+        selected_player_id = st.selectbox(
             "Player",
-            options=[None] + player_options,
-            format_func=lambda x: "Select a player..." if x is None else (x[1] if isinstance(x, tuple) else x),
-            index=0 if st.session_state.selected_player_id is None else current_idx + 1,
+            options=player_ids,
+            format_func=lambda pid: "Select a player..." if pid is None else player_labels[pid],
+            index=player_ids.index(selected_player_id),
             key="player_selectbox"
         )
         
-        if selected_player_option is not None:
-            st.session_state.selected_player_id = selected_player_option[0]
-        else:
-            st.session_state.selected_player_id = None
+        st.session_state.selected_player_name = (
+            None if selected_player_id is None else player_names[selected_player_id]
+        )
+        st.session_state.selected_player_id = selected_player_id
             
         # Dropdown 3: Opponent Team Selection (only visible after player is selected)
-        if st.session_state.selected_player_id is not None:
+        if selected_player_id is not None:
             # Get opponent teams (exclude selected team)
-            opponent_options = [opt for opt in team_options if opt != st.session_state.selected_team]
+            opponent_options = [opt for opt in team_options if opt != selected_team]
             
             col_opp_title, col_opp_buttons = st.columns([3, 1])
             with col_opp_title:
                 st.markdown("### Select Opponent Team")
             with col_opp_buttons:
                 # Home/Away buttons for opponent team
-                if st.session_state.selected_opponent is not None:
+                if selected_opponent is not None:
                     col_home, col_away = st.columns(2)
                     with col_home:
-                        home_selected = st.button("Home", key="opponent_team_home_btn",
-                                                type="primary" if st.session_state.opponent_team_home_away == "home" else "secondary",
-                                                use_container_width=True)
-                        if home_selected:
-                            st.session_state.opponent_team_home_away = "home"
-                            st.session_state.player_team_home_away = "away"
-                            st.rerun()
+                        st.button("Home", key="opponent_team_home_btn",
+                                  type="primary" if st.session_state.opponent_team_home_away == "home" else "secondary",
+                                  use_container_width=True,
+                                  on_click=set_player_team_home_away, args=("away",))
                     with col_away:
-                        away_selected = st.button("Away", key="opponent_team_away_btn",
-                                                type="primary" if st.session_state.opponent_team_home_away == "away" else "secondary",
-                                                use_container_width=True)
-                        if away_selected:
-                            st.session_state.opponent_team_home_away = "away"
-                            st.session_state.player_team_home_away = "home"
-                            st.rerun()
+                        st.button("Away", key="opponent_team_away_btn",
+                                  type="primary" if st.session_state.opponent_team_home_away == "away" else "secondary",
+                                  use_container_width=True,
+                                  on_click=set_player_team_home_away, args=("home",))
             
             # Find current selection index
             current_opp_idx = 0
-            if st.session_state.selected_opponent is not None and st.session_state.selected_opponent in opponent_options:
-                current_opp_idx = opponent_options.index(st.session_state.selected_opponent) + 1
+            if selected_opponent is not None and selected_opponent in opponent_options:
+                current_opp_idx = opponent_options.index(selected_opponent) + 1
             
             selected_opponent = st.selectbox(
                 "Opponent Team",
                 options=[None] + opponent_options,
-                index=0 if st.session_state.selected_opponent is None else current_opp_idx,
+                index=0 if selected_opponent is None else current_opp_idx,
                 key="opponent_selectbox"
             )
             
             st.session_state.selected_opponent = selected_opponent
             
-            # Dropdown 4: Prop Line Input (only visible after player is selected)
-            if st.session_state.selected_opponent is not None:
-                st.markdown("### Enter Prop Line")
-                prop_line = st.number_input(
-                    "Prop Line",
-                    min_value=0.0,
-                    max_value=100.0,
-                    value=29.5 if st.session_state.prop_line is None else st.session_state.prop_line,
-                    step=0.5,
-                    key="prop_line_input"
-                )
-                
-                st.session_state.prop_line = prop_line
-                
-                # Render player scoring plot when all selections are made
-                if (st.session_state.selected_team is not None and
-                    st.session_state.selected_player_id is not None and
-                    st.session_state.selected_opponent is not None and
-                    st.session_state.prop_line is not None):
-                    
-                    # Query data from database
-                    pbs = load_process_pbs_from_db(engine, person_id=st.session_state.selected_player_id)
-                    tbs = load_process_tbs_from_db(engine)
-                    daily_ranks = build_ranks(tbs)
-
-                    # Get team records and ranks for matchup header
-                    # Get most recent daily_ranks for current records
-                    latest_ranks = daily_ranks[daily_ranks["game_date"] == daily_ranks["game_date"].max()]
-                    
-                    # Get player team stats
-                    player_team_stats = latest_ranks[latest_ranks["TEAM_ABBREVIATION"] == st.session_state.selected_team]
-                    player_team_record = tbs[tbs["TEAM_ABBREVIATION"] == st.session_state.selected_team].sort_values("GAME_DATE")
-                    player_wins = len(player_team_record[player_team_record["WL"] == "W"])
-                    player_losses = len(player_team_record[player_team_record["WL"] == "L"])
-                    player_l10_record = player_team_record.tail(10)
-                    player_l10_wins = len(player_l10_record[player_l10_record["WL"] == "W"])
-                    player_l10_losses = len(player_l10_record[player_l10_record["WL"] == "L"])
-                    player_off_rank = int(player_team_stats["off_rank"].iloc[0]) if len(player_team_stats) > 0 else None
-                    player_def_rank = int(player_team_stats["def_rank"].iloc[0]) if len(player_team_stats) > 0 else None
-                    
-                    # Get opponent team stats
-                    opp_team_stats = latest_ranks[latest_ranks["TEAM_ABBREVIATION"] == st.session_state.selected_opponent]
-                    opp_team_record = tbs[tbs["TEAM_ABBREVIATION"] == st.session_state.selected_opponent].sort_values("GAME_DATE")
-                    opp_wins = len(opp_team_record[opp_team_record["WL"] == "W"])
-                    opp_losses = len(opp_team_record[opp_team_record["WL"] == "L"])
-                    opp_l10_record = opp_team_record.tail(10)
-                    opp_l10_wins = len(opp_l10_record[opp_l10_record["WL"] == "W"])
-                    opp_l10_losses = len(opp_l10_record[opp_l10_record["WL"] == "L"])
-                    opp_def_rank = int(opp_team_stats["def_rank"].iloc[0]) if len(opp_team_stats) > 0 else None
-                    opp_off_rank = int(opp_team_stats["off_rank"].iloc[0]) if len(opp_team_stats) > 0 else None
-                    
-                    # Get team full names
-                    player_team_name = get_team_full_name(st.session_state.selected_team)
-                    opp_team_name = get_team_full_name(st.session_state.selected_opponent)
-                    
-                    # Determine home/away based on selection or default
-                    if st.session_state.player_team_home_away == "home":
-                        away_team = st.session_state.selected_opponent
-                        home_team = st.session_state.selected_team
-                        away_name = opp_team_name
-                        home_name = player_team_name
-                    elif st.session_state.opponent_team_home_away == "home":
-                        away_team = st.session_state.selected_team
-                        home_team = st.session_state.selected_opponent
-                        away_name = player_team_name
-                        home_name = opp_team_name
-                    else:
-                        # Default: player team at home
-                        away_team = st.session_state.selected_opponent
-                        home_team = st.session_state.selected_team
-                        away_name = opp_team_name
-                        home_name = player_team_name
-                    
-                    # Determine records based on which team is away/home
-                    if away_team == st.session_state.selected_opponent:
-                        away_record_szn = f"{opp_wins}-{opp_losses}"
-                        away_record_l10 = f"{opp_l10_wins}-{opp_l10_losses}"
-                        home_record_szn = f"{player_wins}-{player_losses}"
-                        home_record_l10 = f"{player_l10_wins}-{player_l10_losses}"
-                    else:
-                        away_record_szn = f"{player_wins}-{player_losses}"
-                        away_record_l10 = f"{player_l10_wins}-{player_l10_losses}"
-                        home_record_szn = f"{opp_wins}-{opp_losses}"
-                        home_record_l10 = f"{opp_l10_wins}-{opp_l10_losses}"
-                    
-                    # Render matchup header
-                    # Always show player team on left (offensive rank) and opponent team on right (defensive rank)
-                    # Determine which team is left/right based on away/home position
-                    if away_team == st.session_state.selected_team:
-                        # Player team is away (left side)
-                        left_record_szn = away_record_szn
-                        left_record_l10 = away_record_l10
-                        left_name = away_name
-                        left_rank_label = "Off Rank"
-                        left_rank_value = player_off_rank
-                        
-                        right_record_szn = home_record_szn
-                        right_record_l10 = home_record_l10
-                        right_name = home_name
-                        right_rank_label = "Def Rank"
-                        right_rank_value = opp_def_rank
-                    else:
-                        # Opponent team is away (left side), player team is home (right side)
-                        left_record_szn = away_record_szn
-                        left_record_l10 = away_record_l10
-                        left_name = away_name
-                        left_rank_label = "Def Rank"
-                        left_rank_value = opp_def_rank
-                        
-                        right_record_szn = home_record_szn
-                        right_record_l10 = home_record_l10
-                        right_name = home_name
-                        right_rank_label = "Off Rank"
-                        right_rank_value = player_off_rank
-                    
-                    st.markdown("---")
-                    matchup_html = f"""
-                    <div style='text-align: center; padding: 1rem; background-color: rgba(0,0,0,0.1); border-radius: 10px; margin: 1rem 0;'>
-                        <h2 style='margin-bottom: 1rem;'>{away_name} @ {home_name}</h2>
-                        <div style='display: flex; justify-content: center; gap: 1rem;'>
-                            <div style='text-align: center; flex: 1;'>
-                                <div style='margin-bottom: 0.5rem; font-size: 16px; font-weight: bold;'>{left_record_szn} (L10: {left_record_l10})</div>
-                                <div style='font-size: 16px; font-weight: bold;'>{left_rank_label} #{left_rank_value if left_rank_value else 'N/A'}</div>
-                            </div>
-                            <div style='text-align: center; flex: 1;'>
-                                <div style='margin-bottom: 0.5rem; font-size: 16px; font-weight: bold;'>{right_record_szn} (L10: {right_record_l10})</div>
-                                <div style='font-size: 16px; font-weight: bold;'>{right_rank_label} #{right_rank_value if right_rank_value else 'N/A'}</div>
-                            </div>
-                        </div>
-                    </div>
-                    """
-                    st.markdown(matchup_html, unsafe_allow_html=True)
-                    
-                    # Get player name for header
-                    player_name_row = (
-                        pbs[pbs["personId"] == st.session_state.selected_player_id]
-                        [["firstName", "familyName"]]
-                        .drop_duplicates()
-                        .iloc[0]
-                    )
-                    player_display_name = f"{player_name_row['firstName']} {player_name_row['familyName']}"
-                    
-                    # Render player scoring plot and hit rate table
-                    st.markdown(f"<h2 style='text-align: center;'>{player_display_name} - Over {st.session_state.prop_line} Points</h2>", unsafe_allow_html=True)
-                    
-                    # Render player scoring plot (full width)
-                    player_scoring_fig, _ = plot_player_scoring(
-                        st.session_state.selected_player_id,
-                        st.session_state.prop_line,
-                        pbs,
-                        tbs,
-                        daily_ranks,
-                        teammate_ids=None  # Can add teammate selection later
-                    )
-                    
-                    # Use larger size for the plot
-                    player_scoring_fig.set_size_inches(32, 15)
-                    player_scoring_fig.tight_layout()
-                    st.pyplot(player_scoring_fig, use_container_width=True)
-                    plt.close(player_scoring_fig)
-                    
-                    # Add spacing between player scoring plot and bottom section
-                    st.markdown("<div style='height: 2rem;'></div>", unsafe_allow_html=True)
-                    
-                    # Render hit rate summary table and team matchup comparison side by side
-                    # Condensed table (30%) and expanded plot (70%)
-                    col_table, col_plot = st.columns([0.3, 0.7])
-                    
-                    with col_table:
-                        st.markdown("<h3 style='text-align: center; margin-bottom: 1rem;'>Hit Rate Summary</h3>", unsafe_allow_html=True)
-                        
-                        # Determine player's home/away status for this matchup
-                        if home_team == st.session_state.selected_team:
-                            player_home_away = "HOME"
-                        else:
-                            player_home_away = "AWAY"
-                        
-                        # Determine opponent defensive bucket based on their current defensive rank
-                        matchup_opp_def_bucket = None
-                        if opp_def_rank is not None:
-                            if opp_def_rank <= 10:
-                                matchup_opp_def_bucket = "Top 10 Defense"
-                            elif opp_def_rank <= 20:
-                                matchup_opp_def_bucket = "Middle 10 Defense"
-                            else:
-                                matchup_opp_def_bucket = "Bottom 10 Defense"
-                        
-                        summary_table = player_hit_rate_summary(
-                            st.session_state.selected_player_id,
-                            st.session_state.prop_line,
-                            pbs,
-                            tbs,
-                            daily_ranks,
-                            teammates=None,  # Can add teammate selection later
-                            matchup_home_away=player_home_away,
-                            matchup_opp_def_bucket=matchup_opp_def_bucket
-                        )
-                        
-                        # Filter out rows with no data (Games = 0 or Hit Rate is None, or empty categories)
-                        summary_table_filtered = summary_table[
-                            (summary_table["Games"] > 0) & 
-                            (summary_table["Hit Rate (%)"].notna()) &
-                            (summary_table["Category"].notna()) &  # Remove rows with empty category names
-                            (summary_table["Category"] != "")  # Remove rows with empty string categories
-                        ].copy()
-                        
-                        # Calculate table height with increased row height to fill available space
-                        # Increase per-row height to make table fill more space - expanded to fill empty space
-                        table_height = (len(summary_table_filtered) + 1) * 65 + 50  # Increased row height to fill more space
-                        
-                        st.dataframe(
-                            summary_table_filtered,
-                            use_container_width=True,
-                            hide_index=True,
-                            height=table_height
-                        )
-                    
-                    with col_plot:
-                        # Get team abbreviations from session state
-                        player_team_abbrev = st.session_state.selected_team
-                        opponent_team_abbrev = st.session_state.selected_opponent
-                        
-                        # Determine home/away based on session state
-                        if st.session_state.player_team_home_away == "Home":
-                            home_team = player_team_abbrev
-                            away_team = opponent_team_abbrev
-                        else:
-                            home_team = opponent_team_abbrev
-                            away_team = player_team_abbrev
-                        
-                        # Build matchup stats and plot
-                        from plots.team import build_team_matchup_stats, plot_team_matchup_comparison
-                        
-                        matchup_df = build_team_matchup_stats(
-                            off_team=player_team_abbrev,
-                            def_team=opponent_team_abbrev,
-                            home_team=home_team,
-                            away_team=away_team,
-    tbs=tbs,
-                            daily_ranks=daily_ranks
-                        )
-                        
-                        matchup_fig, matchup_df_returned = plot_team_matchup_comparison(
-                            matchup_df=matchup_df,
-                            off_team=player_team_abbrev,
-                            def_team=opponent_team_abbrev,
-                            home_team=home_team,
-                            away_team=away_team
-                        )
-                        
-                        # Calculate plot height to match hit rate table
-                        # With expanded plot (70% width), we can make it taller to reduce empty space
-                        table_height = (len(summary_table_filtered) + 1) * 42 + 3
-                        # Convert pixels to inches - make plot significantly taller to reduce gap
-                        plot_height_inches = max(14, table_height / 30)  # Much taller plot
-                        matchup_fig.set_size_inches(25, plot_height_inches)
-                        matchup_fig.tight_layout()
-                        
-                        # Create custom layout with labels on left and plot on right
-                        n_conditions = len(matchup_df_returned)
-                        bar_width = 0.35
-                        
-                        # Create HTML with labels split into two lines (except Season Averages)
-                        # Each condition gets two label divs aligned with each bar
-                        # Group conditions to add spacing between categories
-                        label_divs = ""
-                        prev_was_bucket_pair = False
-                        
-                        i = 0
-                        while i < len(matchup_df_returned["condition"]):
-                            condition = matchup_df_returned.iloc[i]["condition"]
-                            
-                            # Check if this is a bucket average single-row condition
-                            is_bucket_single = " vs " in condition and " / " not in condition and condition != "Season Averages"
-                            has_off = pd.notna(matchup_df_returned.iloc[i]["off_team_pts_scored"])
-                            has_def = pd.notna(matchup_df_returned.iloc[i]["def_team_pts_allowed"])
-                            is_bucket_first = is_bucket_single and ((has_off and not has_def) or (not has_off and has_def))
-                            
-                            # Check if next row is the matching bucket average
-                            is_bucket_pair = False
-                            if is_bucket_first and i < len(matchup_df_returned) - 1:
-                                next_condition = matchup_df_returned.iloc[i+1]["condition"]
-                                next_has_off = pd.notna(matchup_df_returned.iloc[i+1]["off_team_pts_scored"])
-                                next_has_def = pd.notna(matchup_df_returned.iloc[i+1]["def_team_pts_allowed"])
-                                if (" vs " in next_condition and " / " not in next_condition and
-                                    next_condition != "Season Averages" and
-                                    ((next_has_off and not next_has_def) or (not next_has_off and next_has_def))):
-                                    is_bucket_pair = True
-                            
-                            # Add spacing between condition categories (but not between bucket pair rows)
-                            if i > 0 and not prev_was_bucket_pair and not is_bucket_pair:
-                                # Add margin between different condition categories
-                                label_divs += '<div style="height: 10px;"></div>'  # Spacing between categories
-                            
-                            if condition == "Season Averages":
-                                # Single line centered for Season Averages
-                                label_divs += f'<div style="font-size: 15px; font-weight: bold; padding: 2px 0; line-height: 1.2; text-align: right; height: {bar_width * 2 * 60}px; display: flex; align-items: center; justify-content: flex-end; margin: 0;">{condition}</div>'
-                                # Add spacing after Season Averages
-                                label_divs += '<div style="height: 55px;"></div>'
-                                prev_was_bucket_pair = False
-                                i += 1
-                            elif is_bucket_pair:
-                                # Bucket average pair - both labels share the same visual space
-                                condition1 = condition
-                                condition2 = matchup_df_returned.iloc[i+1]["condition"]
-                                # Top label (orange bar)
-                                label_divs += f'<div style="font-size: 15px; font-weight: bold; padding: 0; line-height: 1.2; text-align: right; height: {bar_width * 60}px; display: flex; align-items: flex-end; justify-content: flex-end; margin: 0;">{condition1}</div>'
-                                # Bottom label (blue bar) - tight against top
-                                label_divs += f'<div style="font-size: 15px; font-weight: bold; padding: 0; line-height: 1.2; text-align: right; height: {bar_width * 60}px; display: flex; align-items: flex-start; justify-content: flex-end; margin: 0;">{condition2}</div>'
-                                # Add spacing after bucket pair
-                                label_divs += '<div style="height: 55px;"></div>'
-                                prev_was_bucket_pair = True
-                                i += 2  # Skip both rows
-                            elif is_bucket_single:
-                                # Standalone bucket average (shouldn't happen, but handle it)
-                                if has_off:
-                                    label_divs += f'<div style="font-size: 15px; font-weight: bold; padding: 0; line-height: 1.2; text-align: right; height: {bar_width * 60}px; display: flex; align-items: flex-end; justify-content: flex-end; margin: 0;">{condition}</div>'
-                                    label_divs += f'<div style="height: {bar_width * 60}px; margin: 0;"></div>'
-                                else:
-                                    label_divs += f'<div style="height: {bar_width * 60}px; margin: 0;"></div>'
-                                    label_divs += f'<div style="font-size: 15px; font-weight: bold; padding: 0; line-height: 1.2; text-align: right; height: {bar_width * 60}px; display: flex; align-items: flex-start; justify-content: flex-end; margin: 0;">{condition}</div>'
-                                # Add spacing after standalone bucket
-                                label_divs += '<div style="height: 55px;"></div>'
-                                prev_was_bucket_pair = False
-                                i += 1
-                            else:
-                                # Regular condition with " / " - split into two lines
-                                if " / " in condition:
-                                    parts = condition.split(" / ", 1)
-                                    line1 = parts[0].strip()
-                                    line2 = parts[1].strip()
-                                else:
-                                    # Try to split at comma
-                                    if ", " in condition:
-                                        parts = condition.split(", ", 1)
-                                        line1 = parts[0].strip()
-                                        line2 = parts[1].strip()
-                                    else:
-                                        line1 = condition
-                                        line2 = ""
-                                
-                                # Create two divs aligned with each bar - tight together
-                                # Top bar (orange) - aligned with orange bar
-                                if line1:
-                                    label_divs += f'<div style="font-size: 15px; font-weight: bold; padding: 0; line-height: 1.2; text-align: right; height: {bar_width * 60}px; display: flex; align-items: flex-end; justify-content: flex-end; margin: 0;">{line1}</div>'
-                                else:
-                                    label_divs += f'<div style="height: {bar_width * 60}px; margin: 0;"></div>'
-                                # Bottom bar (blue) - aligned with blue bar, tight against top
-                                if line2:
-                                    label_divs += f'<div style="font-size: 15px; font-weight: bold; padding: 0; line-height: 1.2; text-align: right; height: {bar_width * 60}px; display: flex; align-items: flex-start; justify-content: flex-end; margin: 0;">{line2}</div>'
-                                else:
-                                    label_divs += f'<div style="height: {bar_width * 60}px; margin: 0;"></div>'
-                                # Add spacing after regular condition pair
-                                label_divs += '<div style="height: 55px;"></div>'
-                                prev_was_bucket_pair = False
-                                i += 1
-                        
-                        # Calculate total height for label container to match plot
-                        # Adjust padding-top to center container with plot's y-axis
-                        label_container_height = plot_height_inches * 80  # Approximate conversion
-                        # Adjust padding-top to align labels with bars - centered with plot (much larger for visible effect)
-                        label_html = f'<div style="display: flex; flex-direction: column; justify-content: flex-start; height: {label_container_height}px; padding-right: 15px; padding-top: 135px;">{label_divs}</div>'
-                        
-                        # Display labels and plot side by side
-                        label_col, plot_col = st.columns([0.35, 0.65])
-                        
-                        with label_col:
-                            st.markdown(label_html, unsafe_allow_html=True)
-                        
-                        with plot_col:
-                            # Add title above plot only (centered over plot, not over plot + labels)
-                            st.markdown(f"<h2 style='text-align: center; margin-bottom: 1rem; font-size: 24px;'>{away_team} @ {home_team}<br>Points Scored vs Points Allowed by Condition</h2>", unsafe_allow_html=True)
-                            st.pyplot(matchup_fig, use_container_width=True)
-                        
-                        plt.close(matchup_fig)
+            # Dropdown 4: Prop Line Input + dashboard (fragment; only visible after opponent is selected)
+            if selected_opponent is not None:
+                render_dashboard()
     else:
-        st.warning(f"No players found for team {st.session_state.selected_team}")
\ No newline at end of file
+        st.warning(f"No players found for team {selected_team}")
\ No newline at end of file
@@ -0,0 +1,128 @@
+import pandas as pd
+import numpy as np
+
+def player_game_slice(player_id, pbs, tbs):
+    """
+    Build a player's game-level dataframe joined with their team's game context.
+
+    The player plots and hit rate table all start from this same filter + join,
+    so compute it once per render and pass it in via their player_slice argument.
+
+    Parameters:
+    -----------
+    player_id : int
+        Player personId
+    pbs : pd.DataFrame
+        Player box scores dataframe (indexed by personId)
+    tbs : pd.DataFrame
+        Team box scores dataframe
+
+    Returns:
+    --------
+    pd.DataFrame
+        One row per player game sorted by game_date, with the pbs columns plus:
+        game_date_dt, WL, team_pts, MATCHUP, OPP_TEAM, HOME_AWAY
+    """
+
+    player_df = (
+        pbs.loc[[player_id]]
+        .sort_values(["game_date", "game_id"])
+        .reset_index(drop=True)
+    )
+
+    player_df["game_date_dt"] = pd.to_datetime(player_df["game_date"])
+
+    # Get player's team
+    team_abbrev = player_df["teamTricode"].iloc[0]
+
+    # Team rows only, projected to the context columns before joining
+    team_games = (
+        tbs.loc[
+            tbs["TEAM_ABBREVIATION"] == team_abbrev,
+            ["GAME_ID", "WL", "PTS", "MATCHUP", "OPP_TEAM", "HOME_AWAY"]
+        ]
+        .rename(columns={
+            "GAME_ID": "game_id",
+            "PTS": "team_pts"
+        })
+    )
+
+    player_df = player_df.merge(
+        team_games,
+        on="game_id",
+        how="left",
+        validate="one_to_one"
+    )
+
+    return player_df
+
+def build_played_lookup(pbs):
+    """
+    Build a game_id x personId matrix of who has a box score in each game.
+
+    Teammate absence flags read from this instead of rescanning pbs for every
+    teammate; build it once and pass it in via played_lookup.
+
+    Parameters:
+    -----------
+    pbs : pd.DataFrame
+        Player box scores dataframe
+
+    Returns:
+    --------
+    pd.DataFrame
+        Boolean frame indexed by game_id with one column per personId
+    """
+
+    return (
+        pbs[["game_id", "personId"]]
+        .assign(played=True)
+        .pivot_table(
+            index="game_id",
+            columns="personId",
+            values="played",
+            aggfunc="any",
+            fill_value=False
+        )
+    )
+
+def teammates_out(game_ids, teammate_ids, pbs, played_lookup=None):
+    """
+    Flag the games each teammate missed.
+
+    Parameters:
+    -----------
+    game_ids : array-like
+        Player's game_ids, one per row of the result
+    teammate_ids : list
+        Teammate identifiers (personId int or familyName str); a family name
+        counts as played if any player with that name played
+    pbs : pd.DataFrame
+        Player box scores dataframe
+    played_lookup : pd.DataFrame, optional
+        Precomputed build_played_lookup(pbs); built from the given games if not given
+
+    Returns:
+    --------
+    np.ndarray
+        Boolean array (len(game_ids), len(teammate_ids)), True where the
+        teammate has no box score for that game
+    """
+
+    if played_lookup is None:
+        played_lookup = build_played_lookup(pbs[pbs["game_id"].isin(game_ids)])
+
+    played = played_lookup.reindex(index=game_ids, fill_value=False)
+
+    out = np.empty((len(played), len(teammate_ids)), dtype=bool)
+    for i, teammate_id in enumerate(teammate_ids):
+        if isinstance(teammate_id, str):
+            # Name-based identification (e.g., "reaves")
+            person_ids = pbs.loc[
+                pbs["familyName_lc"] == teammate_id.lower(), "personId"
+            ].unique()
+        else:
+            person_ids = [teammate_id]
+        out[:, i] = ~played.reindex(columns=person_ids, fill_value=False).to_numpy().any(axis=1)
+
+    return out
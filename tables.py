@@ -1,7 +1,9 @@
 import pandas as pd
 import numpy as np
 
-def player_hit_rate_summary(player_id, prop_line, pbs, tbs, daily_ranks, teammates=None, matchup_home_away=None, matchup_opp_def_bucket=None):
+from slices import player_game_slice, teammates_out
+
+def player_hit_rate_summary(player_id, prop_line, pbs, tbs, daily_ranks, teammates=None, matchup_home_away=None, matchup_opp_def_bucket=None, player_slice=None, played_lookup=None):
     """
     Generate a hit rate summary table for a player across various game categories.
     
@@ -23,6 +25,10 @@ def player_hit_rate_summary(player_id, prop_line, pbs, tbs, daily_ranks, teammat
         Home/away status for the current matchup ("HOME" or "AWAY")
     matchup_opp_def_bucket : str, optional
         Opponent defensive bucket for the current matchup (e.g., "Top 10 Defense")
+    player_slice : pd.DataFrame, optional
+        Precomputed player_game_slice(player_id, pbs, tbs); built here if not given
+    played_lookup : pd.DataFrame, optional
+        Precomputed slices.build_played_lookup(pbs) for the teammate flags
         
     Returns:
     --------
@@ -30,67 +36,78 @@ def player_hit_rate_summary(player_id, prop_line, pbs, tbs, daily_ranks, teammat
         Summary table with Category, Games, and Hit Rate (%)
     """
     
-    if teammates is None:
-        teammates = []
+    labels, masks, points = hit_rate_masks(
+        player_id,
+        pbs,
+        tbs,
+        daily_ranks,
+        teammates=teammates,
+        matchup_home_away=matchup_home_away,
+        matchup_opp_def_bucket=matchup_opp_def_bucket,
+        player_slice=player_slice,
+        played_lookup=played_lookup
+    )
     
-    # =========================================================
-    # 1) Base: Player game-level dataframe
-    # =========================================================
+    return hit_rate_table(labels, masks, points, prop_line)
+
+def hit_rate_masks(player_id, pbs, tbs, daily_ranks, teammates=None, matchup_home_away=None, matchup_opp_def_bucket=None, player_slice=None, played_lookup=None):
+    """
+    Build the hit rate table's category masks for a player.
     
-    player_df = (
-        pbs[pbs["personId"] == player_id]
-        .copy()
-    )
+    Everything here is independent of the prop line, so callers can cache it
+    and only rerun hit_rate_table when the line changes.
     
-    player_df["game_date_dt"] = pd.to_datetime(player_df["game_date"])
+    Parameters:
+    -----------
+    player_id : int
+        Player personId
+    pbs : pd.DataFrame
+        Player box scores dataframe
+    tbs : pd.DataFrame
+        Team box scores dataframe
+    daily_ranks : pd.DataFrame
+        Daily team rankings dataframe with defensive ranks
+    teammates : list, optional
+        List of teammate identifiers (personId int or familyName str) to track absence
+    matchup_home_away : str, optional
+        Home/away status for the current matchup ("HOME" or "AWAY")
+    matchup_opp_def_bucket : str, optional
+        Opponent defensive bucket for the current matchup (e.g., "Top 10 Defense")
+    player_slice : pd.DataFrame, optional
+        Precomputed player_game_slice(player_id, pbs, tbs); built here if not given
+    played_lookup : pd.DataFrame, optional
+        Precomputed slices.build_played_lookup(pbs) for the teammate flags
+        
+    Returns:
+    --------
+    tuple
+        (labels, masks, points): category labels, a (games x categories)
+        boolean mask matrix, and the player's points per game
+    """
     
-    # Get player's team
-    team_abbrev = player_df["teamTricode"].iloc[0]
+    if teammates is None:
+        teammates = []
     
     # =========================================================
-    # 2) Merge TEAM context (WL, team points, opponent)
+    # 1-2) Player games with TEAM context (shared player slice)
     # =========================================================
     
-    tbs_ctx = tbs.copy()
-    tbs_ctx["GAME_DATE_DT"] = pd.to_datetime(tbs_ctx["GAME_DATE"])
+    if player_slice is None:
+        player_slice = player_game_slice(player_id, pbs, tbs)
     
-    # Team rows only
-    team_games = tbs_ctx[tbs_ctx["TEAM_ABBREVIATION"] == team_abbrev][
-        ["GAME_ID", "GAME_DATE_DT", "WL", "PTS", "MATCHUP"]
-    ].rename(columns={
-        "PTS": "team_pts"
-    })
-    
-    player_df = player_df.merge(
-        team_games,
-        left_on="game_id",
-        right_on="GAME_ID",
-        how="left"
-    )
-    
-    # Home / Away
-    player_df["HOME_AWAY"] = player_df["MATCHUP"].apply(
-        lambda x: "AWAY" if "@" in x else "HOME"
-    )
+    player_df = player_slice
     
     # =========================================================
     # 3) Merge opponent defensive rank (NO leakage)
     # =========================================================
     
-    daily_ranks_plot = daily_ranks.copy()
-    daily_ranks_plot["game_date_dt"] = pd.to_datetime(daily_ranks_plot["game_date"])
-    
-    # Opponent abbreviation
-    player_df["OPP_TEAM"] = player_df["MATCHUP"].str[-3:]
-    
-    player_df = player_df.sort_values("game_date_dt")
-    daily_ranks_plot = daily_ranks_plot.sort_values("game_date_dt")
-    
+    # The slice is already in date order and build_ranks output is sorted by
+    # game_date, so daily_ranks goes in as-is (no copy / re-sort)
     player_df = pd.merge_asof(
         player_df,
-        daily_ranks_plot,
+        daily_ranks,
         left_on="game_date_dt",
-        right_on="game_date_dt",
+        right_on="game_date",
         left_by="OPP_TEAM",
         right_by="TEAM_ABBREVIATION",
         direction="backward"
@@ -100,54 +117,25 @@ def player_hit_rate_summary(player_id, prop_line, pbs, tbs, daily_ranks, teammat
     # 4) Teammate OUT flags (build dynamically)
     # =========================================================
     
-    pbs_names = pbs.copy()
-    pbs_names["familyName"] = pbs_names["familyName"].str.lower()
-    
-    player_game_ids = set(player_df["game_id"])
-    
     teammate_out_cols = []
     teammate_names = []
     
     if teammates:
+        # All teammates' absence flags from one played lookup
+        out_flags = teammates_out(player_df["game_id"], teammates, pbs, played_lookup)
+        
         for i, teammate_id in enumerate(teammates):
+            out_col = f"teammate_{i}_out"
+            player_df[out_col] = out_flags[:, i]
+            
             if isinstance(teammate_id, str):
-                # Name-based identification (e.g., "reaves")
-                teammate_games = set(
-                    pbs_names[
-                        (pbs_names["familyName"] == teammate_id.lower()) &
-                        (pbs_names["game_id"].isin(player_game_ids))
-                    ]["game_id"]
-                )
-                out_col = f"teammate_{i}_out"
-                player_df[out_col] = ~player_df["game_id"].isin(teammate_games)
-                
                 # Get teammate name for labels
-                name_row = (
-                    pbs_names[pbs_names["familyName"] == teammate_id.lower()]
-                    [["familyName"]]
-                    .drop_duplicates()
-                    .iloc[0]
-                )
-                teammate_name = name_row['familyName'].title()
+                name_idx = np.flatnonzero(pbs["familyName_lc"].to_numpy() == teammate_id.lower())[0]
+                teammate_name = pbs["familyName_lc"].iat[name_idx].title()
             else:
-                # personId-based identification
-                teammate_games = set(
-                    pbs_names[
-                        (pbs_names["personId"] == teammate_id) &
-                        (pbs_names["game_id"].isin(player_game_ids))
-                    ]["game_id"]
-                )
-                out_col = f"teammate_{i}_out"
-                player_df[out_col] = ~player_df["game_id"].isin(teammate_games)
-                
                 # Get teammate name for labels
-                name_row = (
-                    pbs_names[pbs_names["personId"] == teammate_id]
-                    [["firstName", "familyName"]]
-                    .drop_duplicates()
-                    .iloc[0]
-                )
-                teammate_name = f"{name_row['firstName'].title()} {name_row['familyName'].title()}"
+                name_idx = np.flatnonzero(pbs["personId"].to_numpy() == teammate_id)[0]
+                teammate_name = f"{pbs['firstName_lc'].iat[name_idx].title()} {pbs['familyName_lc'].iat[name_idx].title()}"
             
             teammate_out_cols.append(out_col)
             teammate_names.append(teammate_name)
@@ -157,109 +145,109 @@ def player_hit_rate_summary(player_id, prop_line, pbs, tbs, daily_ranks, teammat
         player_df[col] = player_df[col].fillna(False)
     
     # =========================================================
-    # 5) Hit flag + defense buckets
+    # 5) Defense buckets
     # =========================================================
     
-    player_df["hit"] = player_df["points"] > prop_line
-    
-    def def_bucket(rank):
-        if pd.isna(rank):
-            return None
-        if rank <= 10:
-            return "Top 10 Defense"
-        elif rank <= 20:
-            return "Middle 10 Defense"
-        else:
-            return "Bottom 10 Defense"
-    
-    player_df["def_bucket"] = player_df["def_rank"].apply(def_bucket)
+    # Rank <= 10 / <= 20 / rest; missing ranks stay NaN
+    player_df["def_bucket"] = pd.cut(
+        player_df["def_rank"],
+        bins=[-np.inf, 10, 20, np.inf],
+        labels=["Top 10 Defense", "Middle 10 Defense", "Bottom 10 Defense"]
+    )
     
     # =========================================================
-    # 6) Helper for hit-rate rows
+    # 6) One boolean mask per summary row
     # =========================================================
     
-    def hit_row(df, label):
-        if len(df) == 0:
-            return {
-                "Category": label,
-                "Games": 0,
-                "Hit Rate (%)": None
-            }
-        return {
-            "Category": label,
-            "Games": len(df),
-            "Hit Rate (%)": round(df["hit"].mean() * 100, 1)
-        }
-    
-    rows = []
+    n_games = len(player_df)
     
-    # =========================================================
-    # 7) Build summary table
-    # =========================================================
+    last_10 = np.zeros(n_games, dtype=bool)
+    last_10[-10:] = True
     
-    rows.append(hit_row(player_df, "Season (All Games)"))
-    rows.append(hit_row(player_df.tail(10), "Last 10 Games"))
+    wl = player_df["WL"].to_numpy()
+    home_away = player_df["HOME_AWAY"].to_numpy()
+    def_bucket = player_df["def_bucket"].to_numpy()
+    team_pts = player_df["team_pts"].to_numpy()
     
-    rows.append(hit_row(player_df[player_df["WL"] == "W"], "Wins"))
-    rows.append(hit_row(player_df[player_df["WL"] == "L"], "Losses"))
-    
-    rows.append(hit_row(player_df[player_df["HOME_AWAY"] == "HOME"], "Home"))
-    rows.append(hit_row(player_df[player_df["HOME_AWAY"] == "AWAY"], "Away"))
+    categories = [
+        ("Season (All Games)", np.ones(n_games, dtype=bool)),
+        ("Last 10 Games", last_10),
+        ("Wins", wl == "W"),
+        ("Losses", wl == "L"),
+        ("Home", home_away == "HOME"),
+        ("Away", home_away == "AWAY"),
+    ]
     
     # Teammate absence rows
-    for i, (out_col, teammate_name) in enumerate(zip(teammate_out_cols, teammate_names)):
-        rows.append(hit_row(player_df[player_df[out_col]], f"{teammate_name} OUT"))
+    teammate_out = [player_df[col].to_numpy(dtype=bool) for col in teammate_out_cols]
+    for out_mask, teammate_name in zip(teammate_out, teammate_names):
+        categories.append((f"{teammate_name} OUT", out_mask))
     
     # Combined teammate absence (if 2+ teammates)
-    if len(teammate_out_cols) >= 2:
-        combined_mask = player_df[teammate_out_cols[0]]
-        for col in teammate_out_cols[1:]:
-            combined_mask = combined_mask & player_df[col]
+    if len(teammate_out) >= 2:
         combined_name = " + ".join(teammate_names) + " OUT"
-        rows.append(hit_row(player_df[combined_mask], combined_name))
+        categories.append((combined_name, np.logical_and.reduce(teammate_out)))
     
     # Defense bucket rows
-    rows.append(hit_row(
-        player_df[player_df["def_bucket"] == "Top 10 Defense"],
-        "Top 10 Defense"
-    ))
-    rows.append(hit_row(
-        player_df[player_df["def_bucket"] == "Middle 10 Defense"],
-        "Middle 10 Defense"
-    ))
-    rows.append(hit_row(
-        player_df[player_df["def_bucket"] == "Bottom 10 Defense"],
-        "Bottom 10 Defense"
-    ))
+    for bucket in ["Top 10 Defense", "Middle 10 Defense", "Bottom 10 Defense"]:
+        categories.append((bucket, def_bucket == bucket))
     
     # Team points threshold rows
-    rows.append(hit_row(
-        player_df[player_df["team_pts"] >= 100],
-        "Team ≥100 Points"
-    ))
-    rows.append(hit_row(
-        player_df[player_df["team_pts"] >= 110],
-        "Team ≥110 Points"
-    ))
-    rows.append(hit_row(
-        player_df[player_df["team_pts"] >= 120],
-        "Team ≥120 Points"
-    ))
+    for threshold in [100, 110, 120]:
+        categories.append((f"Team ≥{threshold} Points", team_pts >= threshold))
     
     # Matchup-specific row: Home/Away AND Opponent Defensive Bucket
     if matchup_home_away is not None and matchup_opp_def_bucket is not None:
-        matchup_mask = (
-            (player_df["HOME_AWAY"] == matchup_home_away) & 
-            (player_df["def_bucket"] == matchup_opp_def_bucket)
-        )
+        matchup_mask = (home_away == matchup_home_away) & (def_bucket == matchup_opp_def_bucket)
         matchup_label = f"{matchup_home_away} vs {matchup_opp_def_bucket}"
-        rows.append(hit_row(player_df[matchup_mask], matchup_label))
+        categories.append((matchup_label, matchup_mask))
+    
+    labels = [label for label, _ in categories]
+    masks = np.column_stack([mask for _, mask in categories])
     
-    summary_table = pd.DataFrame(rows)
+    return labels, masks, player_df["points"].to_numpy(dtype=float, na_value=np.nan)
+
+def hit_rate_table(labels, masks, points, prop_line):
+    """
+    Hit rate summary table from hit_rate_masks() output for one prop line.
+    
+    Parameters:
+    -----------
+    labels : list
+        Category labels, one per mask column
+    masks : np.ndarray
+        Boolean (games x categories) mask matrix
+    points : np.ndarray
+        Player points per game
+    prop_line : float
+        Prop line threshold (e.g., 29.5)
+    
+    Returns:
+    --------
+    pd.DataFrame
+        Summary table with Category, Games, and Hit Rate (%)
+    """
+    
+    # =========================================================
+    # 7) Build summary table (all rows in one pass over the masks)
+    # =========================================================
+    
+    hit = points > prop_line
+    
+    games = masks.sum(axis=0)
+    hits = (masks & hit[:, None]).sum(axis=0)
+    
+    # Empty categories divide by zero -> NaN, dropped below
+    with np.errstate(divide="ignore", invalid="ignore"):
+        hit_rate = np.round(hits / games * 100, 1)
+    
+    summary_table = pd.DataFrame({
+        "Category": labels,
+        "Games": games,
+        "Hit Rate (%)": hit_rate
+    })
     
     # Filter out rows with no data (Games = 0 or Hit Rate is None)
-    summary_table = summary_table[
-        (summary_table["Games"] > 0) & (summary_table["Hit Rate (%)"].notna())
-    ].copy()
+    summary_table = summary_table[(games > 0) & ~np.isnan(hit_rate)]
     
     return summary_table